@@ -0,0 +1,57 @@
+"""Compare re-parsing each card with str(card) against parsing the search page once.
+
+Run from the repository root:
+    python -m benchmarks.bench_card_parsing --cards 50
+"""
+import argparse
+import json
+import timeit
+from src.config_loader import ConfigLoader
+from src.parser import Parser
+
+CARD_TEMPLATE = """
+<div class="propertyCard">
+  <a class="detailsLink" href="/listing/{i}"><img class="main-photo" src="https://img.example.com/{i}.jpg"></a>
+  <h2 class="title">{i} Example Avenue</h2>
+  <span class="price">${price:,}</span>
+  <div class="address">{i} Example Avenue, Brooklyn, NY 11201</div>
+  <ul class="facts"><li>3 bd</li><li>2 ba</li><li>1,450 sqft</li></ul>
+</div>
+"""
+
+def build_search_page(cards):
+    """Build a synthetic OneKey-style search page"""
+    body = ''.join(CARD_TEMPLATE.format(i=i, price=500000 + i * 1000) for i in range(cards))
+    return f'<html><head><title>Results</title></head><body><div class="results">{body}</div></body></html>'
+
+def parse_with_reserialize(html, selectors):
+    """The previous pipeline: extract card nodes, then re-parse each card from its HTML"""
+    cards = Parser.extract_listing_cards(html, selectors)
+    return [Parser.parse_listing_card(str(card), selectors) for card in cards]
+
+def parse_single_tree(html, selectors):
+    return Parser.parse_search_page(html, selectors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    selectors = ConfigLoader().get_config('onekey_sales')['selectors']
+    html = build_search_page(args.cards)
+    assert parse_with_reserialize(html, selectors) == parse_single_tree(html, selectors)
+
+    results = {'cards': args.cards}
+    for name, func in (('reserialize', parse_with_reserialize), ('single_tree', parse_single_tree)):
+        best = min(timeit.repeat(lambda: func(html, selectors), repeat=args.repeat, number=args.number))
+        results[name] = {
+            'ms_per_page': best / args.number * 1000,
+            'cards_per_sec': args.cards * args.number / best
+        }
+    results['speedup'] = results['reserialize']['ms_per_page'] / results['single_tree']['ms_per_page']
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
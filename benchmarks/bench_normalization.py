@@ -0,0 +1,77 @@
+"""Compare per-field normalization during parsing with the batched normalization stage.
+
+Run from the repository root:
+    python -m benchmarks.bench_normalization --listings 500
+"""
+import re
+import copy
+import json
+import random
+import argparse
+import timeit
+from src.listing import Listing, Details
+from src.normalizer import normalize_listings
+
+PRICES = ['$1,250,000', '$3,500/mo', ' $975,000 ', 'Price not available', '$12,000,000', '$2,150']
+BEDS = ['3 beds', '1 bd', 'Studio', '4', '']
+SQFT = ['1,200 sqft', '850 ft²', '', '2,450 sq. ft.']
+
+def raw_listings(count, seed=7):
+    """Listings as the parser now emits them: prices and numbers still text"""
+    rng = random.Random(seed)
+    return [Listing(
+        title=f"{i} Example Avenue",
+        price=rng.choice(PRICES),
+        location=f"{i} Example Avenue, Brooklyn, NY",
+        details=Details(
+            beds=rng.choice(BEDS), baths=rng.choice(['2 baths', '1.5 ba', '']),
+            sqft=rng.choice(SQFT), acres=rng.choice(['0.25 acres', '']),
+            property_type='Condo'
+        )
+    ) for i in range(count)]
+
+def legacy_format_price(price_text):
+    if not price_text:
+        return ""
+    price = re.sub(r'[^\d.]', '', price_text)
+    try:
+        return f"${float(price):,.0f}"
+    except ValueError:
+        return price_text
+
+def legacy_extract_number(text):
+    if not text:
+        return None
+    numbers = re.findall(r'\d+\.?\d*', text)
+    return float(numbers[0]) if numbers else None
+
+def normalize_per_field(listings):
+    """The previous path: uncompiled patterns, one field at a time inside the parser"""
+    for listing in listings:
+        listing.price = legacy_format_price(listing.price)
+        for field in ('beds', 'baths', 'sqft', 'acres'):
+            setattr(listing.details, field, legacy_extract_number(getattr(listing.details, field)))
+    return listings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--listings', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    listings = raw_listings(args.listings)
+    results = {'listings': args.listings}
+    for name, func in (('per_field', normalize_per_field), ('batch', normalize_listings)):
+        batches = [copy.deepcopy(listings) for _ in range(args.repeat * args.number)]
+        best = min(timeit.repeat(lambda: func(batches.pop()), repeat=args.repeat, number=args.number))
+        results[name] = {'us_per_listing': best / args.number / args.listings * 1e6}
+    results['speedup'] = results['per_field']['us_per_listing'] / results['batch']['us_per_listing']
+
+    # The legacy path read "1,200 sqft" as 1.0; the batch stage keeps thousands separators
+    sample = normalize_listings(raw_listings(1, seed=3))[0]
+    results['sample'] = {'price': sample.price, 'price_value': sample.price_value, 'sqft': sample.details.sqft}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
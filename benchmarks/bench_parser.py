@@ -0,0 +1,181 @@
+"""Benchmark the parser on every site's synthetic fixtures and on 500+ card pages built from them.
+
+Run from the repository root:
+    python -m benchmarks.bench_parser --output benchmarks/results/parser-before.json
+    python -m benchmarks.bench_parser --compare benchmarks/results/parser-before.json
+
+For each site and parser backend it measures, on the fixture and on a
+larger page built by repeating the fixture's cards:
+  extract_listing_cards  cards/sec for finding the card nodes
+  parse_listing_card     cards/sec for parsing already extracted card nodes
+  parse_search_page      cards/sec end to end
+  parse_listing_detail   detail pages/sec
+  peak_kb                tracemalloc peak while parsing each page once (Python
+                         allocations only; lxml's C-level trees are not traced)
+With --compare, throughput that drops by more than --threshold against the
+baseline is reported and the run exits non-zero.
+
+The fixtures in benchmarks/fixtures are synthetic, not recorded pages: about
+24 small cards per site on example.com URLs, generated from the selectors in
+config/sites.json. They exercise every selector but are far smaller and
+simpler than live markup, so absolute numbers understate real parse costs;
+compare runs against each other, not against production timings.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import timeit
+import tracemalloc
+from bs4 import BeautifulSoup
+from src.config_loader import ConfigLoader
+from src.parser import Parser
+from src.selector_plan import SelectorPlan
+from benchmarks.bench_parser_backends import FIXTURE_DIR, load_fixture
+
+BACKENDS = ('bs4', 'lxml')
+CARDS_MARKER = '@@BENCH_CARDS@@'
+
+def synthetic_search_page(search_html, selectors, cards):
+    """Repeat the fixture's cards inside its own page shell until there are at least `cards` of them"""
+    plan = SelectorPlan.for_selectors(selectors, 'bs4')
+    card_html = [str(card) for card in Parser.extract_listing_cards(search_html, plan)]
+    soup = BeautifulSoup(search_html, 'lxml')
+    container = plan.list_container.select_one(soup)
+    container.clear()
+    container.append(CARDS_MARKER)
+    repeats = -(-cards // len(card_html))
+    return str(soup).replace(CARDS_MARKER, ''.join(card_html * repeats))
+
+def best_rate(func, items, repeat, number):
+    """Items per second over the best of `repeat` runs"""
+    best = min(timeit.repeat(func, repeat=repeat, number=number))
+    return items * number / best
+
+def peak_kb(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def bench_search_page(html, plan, repeat, number):
+    nodes = Parser.extract_listing_cards(html, plan)
+    cards = len(nodes)
+    return {
+        'cards': cards,
+        'extract_listing_cards': best_rate(lambda: Parser.extract_listing_cards(html, plan), cards, repeat, number),
+        'parse_listing_card': best_rate(lambda: [Parser.parse_listing_card(node, plan) for node in nodes], cards, repeat, number),
+        'parse_search_page': best_rate(lambda: Parser.parse_search_page(html, plan), cards, repeat, number),
+        'peak_kb': peak_kb(lambda: Parser.parse_search_page(html, plan))
+    }
+
+def bench_detail_page(html, plan, repeat, number):
+    return {
+        'parse_listing_detail': best_rate(lambda: Parser.parse_listing_detail(html, plan), 1, repeat, number),
+        'peak_kb': peak_kb(lambda: Parser.parse_listing_detail(html, plan))
+    }
+
+def run_benchmarks(sites, backends, cards, repeat, number):
+    config_loader = ConfigLoader()
+    results = {}
+    for site_name in sites:
+        selectors = config_loader.get_config(site_name)['selectors']
+        search_html = load_fixture(site_name, 'search')
+        detail_html = load_fixture(site_name, 'detail')
+        large_html = synthetic_search_page(search_html, selectors, cards)
+        results[site_name] = {}
+        for backend in backends:
+            plan = SelectorPlan.for_selectors(selectors, backend)
+            results[site_name][backend] = {
+                'search_fixture': bench_search_page(search_html, plan, repeat, number),
+                # Large pages take longer per run, so fewer runs keep the suite quick
+                'search_synthetic': bench_search_page(large_html, plan, repeat, max(1, number // 10)),
+                'detail_fixture': bench_detail_page(detail_html, plan, repeat, number)
+            }
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+def compare(results, baseline, threshold):
+    """Changes in throughput against a baseline run; returns (rows, regressions)"""
+    current = flatten(results)
+    previous = flatten(baseline)
+    rows, regressions = [], []
+    for name, value in sorted(current.items()):
+        # Rates are higher-is-better; peak memory and card counts are only reported
+        if name not in previous or not previous[name] or name.endswith(('.cards', '.peak_kb')):
+            continue
+        change = value / previous[name] - 1
+        rows.append({'metric': name, 'baseline': previous[name], 'current': value, 'change': change})
+        if change < -threshold:
+            regressions.append(name)
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sites', nargs='+', help='Sites to benchmark (default: every site with fixtures)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--cards', type=int, default=600, help='Cards on the synthetic search pages')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--number', type=int, default=20)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier --output run')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Throughput drop treated as a regression')
+    args = parser.parse_args()
+
+    sites = args.sites or sorted(os.listdir(FIXTURE_DIR))
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cards': args.cards,
+            'repeat': args.repeat,
+            'number': args.number
+        },
+        'results': run_benchmarks(sites, args.backends, args.cards, args.repeat, args.number)
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report['results'], baseline['results'], args.threshold)
+        report['comparison'] = {
+            'baseline': baseline['meta'],
+            'changes': rows,
+            'regressions': regressions
+        }
+
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(f"{len(regressions)} parser metrics regressed by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Check the lxml parser backend against bs4 on the synthetic fixtures, then compare their speed.
+
+Run from the repository root:
+    python -m benchmarks.bench_parser_backends --sites onekey_sales streeteasy_sales
+
+Fixtures live in benchmarks/fixtures/<site>/{search,detail}.html. They are
+synthetic pages generated from each site's configured selectors, not captures
+of the live sites, so agreement here says the backends treat those selectors
+alike, not that they agree on every quirk of real markup. Any output
+difference between the backends is reported and fails the run.
+"""
+import os
+import sys
+import json
+import argparse
+import timeit
+from src.config_loader import ConfigLoader
+from src.parser import Parser
+from src.selector_plan import SelectorPlan
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def load_fixture(site_name, page_type):
+    with open(os.path.join(FIXTURE_DIR, site_name, f'{page_type}.html'), encoding='utf-8') as f:
+        return f.read()
+
+def parse_outputs(plan, search_html, detail_html, card_html):
+    """Everything the scrapers get out of the parser for one site"""
+    return {
+        'search': Parser.parse_search_page(search_html, plan),
+        'cards': [Parser.parse_listing_card(html, plan) for html in card_html],
+        'detail': Parser.parse_listing_detail(detail_html, plan),
+        'search_match': Parser.selectors_match(search_html, plan, 'search'),
+        'detail_match': Parser.selectors_match(detail_html, plan, 'detail'),
+        'empty_detail': Parser.parse_listing_detail('', plan)
+    }
+
+def check_site(site_name, selectors):
+    """Return the output keys that differ between the backends"""
+    search_html = load_fixture(site_name, 'search')
+    detail_html = load_fixture(site_name, 'detail')
+    bs4_plan = SelectorPlan.for_selectors(selectors, 'bs4')
+    # Cards handed over as HTML strings take the re-parse path
+    card_html = [str(card) for card in Parser.extract_listing_cards(search_html, bs4_plan)]
+    expected = parse_outputs(bs4_plan, search_html, detail_html, card_html)
+    actual = parse_outputs(SelectorPlan.for_selectors(selectors, 'lxml'), search_html, detail_html, card_html)
+    return [key for key in expected if expected[key] != actual[key]]
+
+def time_backend(backend, selectors, search_html, detail_html, repeat, number):
+    plan = SelectorPlan.for_selectors(selectors, backend)
+    cards = len(Parser.parse_search_page(search_html, plan))
+    search = min(timeit.repeat(lambda: Parser.parse_search_page(search_html, plan), repeat=repeat, number=number))
+    detail = min(timeit.repeat(lambda: Parser.parse_listing_detail(detail_html, plan), repeat=repeat, number=number))
+    return {
+        'cards_per_sec': cards * number / search,
+        'details_per_sec': number / detail
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sites', nargs='+', help='Sites to check (default: every site with fixtures)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    config_loader = ConfigLoader()
+    sites = args.sites or sorted(os.listdir(FIXTURE_DIR))
+
+    results = {}
+    failed = False
+    for site_name in sites:
+        selectors = config_loader.get_config(site_name)['selectors']
+        mismatches = check_site(site_name, selectors)
+        if mismatches:
+            failed = True
+        search_html = load_fixture(site_name, 'search')
+        detail_html = load_fixture(site_name, 'detail')
+        timings = {
+            backend: time_backend(backend, selectors, search_html, detail_html, args.repeat, args.number)
+            for backend in ('bs4', 'lxml')
+        }
+        results[site_name] = {
+            'equivalent': not mismatches,
+            'mismatches': mismatches,
+            **timings,
+            'speedup': timings['lxml']['cards_per_sec'] / timings['bs4']['cards_per_sec']
+        }
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        sys.exit("lxml backend output differs from bs4")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.async_engine import AsyncCrawlEngine
 from src.config_loader import ConfigLoader
-from src.exporter import Exporter
+from src.driver_pool import DriverPool
+from src.dedupe import dedupe_store
+from src.exporter import Exporter, ExportQueue
+from src.http_fetcher import HttpFetcher
+from src.listing_index import ListingIndex
+from src.parse_pool import ParsePool
+from src.rate_limiter import RateLimiter
+from src.response_cache import ResponseCache
 from src.utils import setup_logger
 
 # Import all site scrapers
@@ -12,13 +21,177 @@ from src.sites.onekey_sales import OneKeySalesScraper
 from src.sites.onekey_rentals import OneKeyRentalsScraper
 from src.sites.onekey_commercial_sales import OneKeyCommercialSalesScraper
 from src.sites.onekey_commercial_rentals import OneKeyCommercialRentalsScraper
-# Update src/main.py (enhancements)
+
+# Map site names to scraper classes
+SCRAPER_CLASSES = {
+    'staten_island': StatenIslandScraper,
+    'brooklyn_mls': BrooklynMLSScraper,
+    'streeteasy_sales': StreetEasySalesScraper,
+    'streeteasy_rentals': StreetEasyRentalsScraper,
+    'onekey_sales': OneKeySalesScraper,
+    'onekey_rentals': OneKeyRentalsScraper,
+    'onekey_commercial_sales': OneKeyCommercialSalesScraper,
+    'onekey_commercial_rentals': OneKeyCommercialRentalsScraper
+}
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Real estate multi-scraper")
+    parser.add_argument('--engine', choices=['browser', 'async'], default='browser',
+                        help="browser: threaded Selenium scrapers; async: coroutine HTTP crawler")
+    parser.add_argument('--max-connections', type=int, default=200,
+                        help="Async engine: total HTTP requests in flight")
+    parser.add_argument('--domain-concurrency', type=int, default=None,
+                        help="Async engine: requests in flight per domain (default: host_concurrency)")
+    parser.add_argument('--cache-path', default="data/cache/responses.sqlite",
+                        help="SQLite file caching detail pages between runs")
+    parser.add_argument('--cache-max-mb', type=int, default=500,
+                        help="Evict least recently used cached pages beyond this size")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always download detail pages")
+    parser.add_argument('--index-path', default="data/index/listings.sqlite",
+                        help="SQLite index of listings seen in earlier runs")
+    parser.add_argument('--full-crawl', action='store_true',
+                        help="Refetch every detail page instead of skipping unchanged listings")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Number of sites to scrape concurrently (1 = one site at a time)")
+    parser.add_argument('--max-browsers', type=int, default=None,
+                        help="Cap on live Chrome instances shared by all scrapers "
+                             "(default: one search browser plus detail_workers per concurrent site)")
+    parser.add_argument('--driver-max-pages', type=int, default=100,
+                        help="Recycle a browser after it has loaded this many pages")
+    parser.add_argument('--driver-heap-mb', type=int, default=1024,
+                        help="Recycle a browser once the loaded page's JS heap (performance.memory) grows "
+                             "past this many MB; Chrome's own process memory is not measured")
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help="Worker processes for HTML parsing (default: CPU count, 0 parses inline)")
+    parser.add_argument('--max-pending-pages', type=int, default=None,
+                        help="Pages that may wait for a parse worker before fetching pauses (default: 2 per worker)")
+    parser.add_argument('--json-format', choices=['jsonl', 'json'], default='jsonl',
+                        help="Append listings to listings.jsonl, or rewrite the listings.json array (legacy)")
+    parser.add_argument('--compact-json', action='store_true',
+                        help="After the run, rebuild listings.json as a JSON array from listings.jsonl")
+    parser.add_argument('--db-path', default="data/combined/listings.sqlite",
+                        help="SQLite database holding the latest state of every listing, keyed by site and URL")
+    parser.add_argument('--no-db', action='store_true',
+                        help="Do not write listings to the SQLite database")
+    parser.add_argument('--parquet', action='store_true',
+                        help="Also write Parquet files partitioned by site and scrape date (needs pyarrow)")
+    parser.add_argument('--export-batch-size', type=int, default=200,
+                        help="Listings per export batch; scrapers stream pages to the exporter as they finish")
+    parser.add_argument('--changes-path', default="data/combined/changes.sqlite",
+                        help="SQLite database of run-over-run changes (new, price changes, delisted)")
+    parser.add_argument('--no-changes', action='store_true',
+                        help="Do not track changes between runs")
+    parser.add_argument('--no-dedupe', action='store_true',
+                        help="Skip assigning cross-site property ids in the SQLite database after the run")
+    parser.add_argument('--no-excel', action='store_true',
+                        help="Skip rebuilding listings.xlsx at the end of the run")
+    parser.add_argument('--excel-only', action='store_true',
+                        help="Rebuild listings.xlsx from listings.csv and exit without scraping")
+    return parser.parse_args()
+
+def run_site(site_name, config, driver_pool, http_fetcher, response_cache, listing_index, rate_limiter, parse_pool,
+             on_listings, crawled_sites):
+    """Run a single site scraper in a worker; listings are streamed to on_listings as pages finish.
+
+    The site is added to crawled_sites if the scraper saw every search page.
+    """
+    scraper = SCRAPER_CLASSES[site_name](
+        site_name, config,
+        driver_pool=driver_pool,
+        http_fetcher=http_fetcher,
+        response_cache=response_cache,
+        listing_index=listing_index,
+        rate_limiter=rate_limiter,
+        parse_pool=parse_pool,
+        on_listings=on_listings
+    )
+    try:
+        return scraper.scrape()
+    finally:
+        # Clean up
+        scraper.close()
+        if scraper.crawled_every_page():
+            crawled_sites.add(site_name)
+
+def scrape_with_browsers(args, config_loader, sites, logger, response_cache, listing_index, rate_limiter, parse_pool,
+                         on_listings, crawled_sites):
+    """Run each site scraper in a worker pool, yielding (site_name, listings not yet streamed or error)"""
+    workers = max(1, args.workers)
+    logger.info(f"Running up to {workers} site scrapers concurrently")
+
+    # Browsers are shared by all scrapers instead of one Chrome per site
+    detail_workers = max((config_loader.get_config(site).get('detail_workers', 1) for site in sites), default=1)
+    max_browsers = args.max_browsers or workers * (1 + detail_workers)
+    if max_browsers <= workers:
+        # Every running site holds its search browser, so detail pages need at least one more
+        logger.warning(f"--max-browsers {max_browsers} leaves no browser for detail pages with {workers} workers, "
+                       f"using {workers + 1}")
+        max_browsers = workers + 1
+    driver_pool = DriverPool(
+        max_browsers=max_browsers,
+        max_pages=args.driver_max_pages,
+        heap_limit_mb=args.driver_heap_mb
+    )
+
+    # One keep-alive HTTP session for the HTTP fetch tier of every scraper
+    http_fetcher = HttpFetcher(pool_size=workers * (1 + detail_workers))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for site_name in sites:
+                if site_name not in SCRAPER_CLASSES:
+                    yield site_name, Exception(f"No scraper class found for {site_name}")
+                    continue
+
+                logger.info(f"Starting scraper: {site_name}")
+                config = config_loader.get_config(site_name)
+                futures[executor.submit(
+                    run_site, site_name, config, driver_pool, http_fetcher, response_cache, listing_index,
+                    rate_limiter, parse_pool, on_listings, crawled_sites
+                )] = site_name
+
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+    finally:
+        driver_pool.close()
+        http_fetcher.close()
+
+def scrape_with_async_engine(args, config_loader, sites, logger, response_cache, listing_index, rate_limiter, parse_pool,
+                             on_listings, crawled_sites):
+    """Crawl every site with the asyncio engine, yielding (site_name, listings or error)"""
+    logger.info(f"Running async engine with up to {args.max_connections} requests in flight")
+    engine = AsyncCrawlEngine(
+        {site_name: config_loader.get_config(site_name) for site_name in sites},
+        max_connections=args.max_connections,
+        domain_concurrency=args.domain_concurrency,
+        parse_executor=parse_pool.executor if parse_pool else None,
+        response_cache=response_cache,
+        listing_index=listing_index,
+        rate_limiter=rate_limiter,
+        on_listings=on_listings
+    )
+    results = engine.run()
+    crawled_sites.update(engine.crawled_sites)
+    yield from results.items()
 
 def main():
+    args = parse_args()
+
     # Set up logging
     logger = setup_logger('main', 'logs/allsites.log')
+
+    if args.excel_only:
+        Exporter(json_format=args.json_format).export_excel()
+        return
+
     logger.info("Starting real estate multi-scraper")
-    
+
     # Load configurations
     try:
         config_loader = ConfigLoader()
@@ -27,68 +200,118 @@ def main():
     except Exception as e:
         logger.error(f"Failed to load configurations: {e}")
         return
-    
+
     # Initialize exporter
-    exporter = Exporter()
-    
-    # Map site names to scraper classes
-    scraper_classes = {
-        'staten_island': StatenIslandScraper,
-        'brooklyn_mls': BrooklynMLSScraper,
-        'streeteasy_sales': StreetEasySalesScraper,
-        'streeteasy_rentals': StreetEasyRentalsScraper,
-        'onekey_sales': OneKeySalesScraper,
-        'onekey_rentals': OneKeyRentalsScraper,
-        'onekey_commercial_sales': OneKeyCommercialSalesScraper,
-        'onekey_commercial_rentals': OneKeyCommercialRentalsScraper
-    }
-    
+    try:
+        exporter = Exporter(json_format=args.json_format, db_path=None if args.no_db else args.db_path,
+                            parquet=args.parquet, changes_path=None if args.no_changes else args.changes_path)
+    except Exception as e:
+        logger.error(f"Failed to set up exporter: {e}")
+        return
+
     # Track overall statistics
     total_listings = 0
     successful_sites = 0
     failed_sites = 0
-    
-    # Scrape each site
+
+    # Detail pages are cached on disk between runs
+    response_cache = None
+    if not args.no_cache:
+        response_cache = ResponseCache(args.cache_path, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    # Listings whose cards are unchanged since the last run skip their detail fetch
+    listing_index = None if args.full_crawl else ListingIndex(args.index_path)
+
+    # One adaptive rate limit per domain, shared by every scraper
+    rate_limiter = RateLimiter()
+
+    # HTML is parsed in worker processes so fetching continues while pages parse
+    parse_pool = None
+    if args.parse_workers != 0:
+        parse_pool = ParsePool(workers=args.parse_workers, max_pending=args.max_pending_pages)
+        logger.info(f"Parsing with {parse_pool.workers} worker processes, up to {parse_pool.max_pending} pages pending")
+
+    # Listings reach disk in bounded batches while the crawl runs, written by a single exporter thread
+    export_queue = ExportQueue(exporter, batch_size=args.export_batch_size)
+
+    # Sites whose every search page was seen; only these can tell which of their listings are gone
+    crawled_sites = set()
+    if args.engine == 'async':
+        results = scrape_with_async_engine(args, config_loader, sites, logger, response_cache, listing_index,
+                                           rate_limiter, parse_pool, export_queue.put, crawled_sites)
+    else:
+        results = scrape_with_browsers(args, config_loader, sites, logger, response_cache, listing_index,
+                                       rate_limiter, parse_pool, export_queue.put, crawled_sites)
+
+    errors = {}
+    for site_name, listings in results:
+        if isinstance(listings, Exception):
+            logger.error(f"Error scraping {site_name}: {listings}")
+            errors[site_name] = listings
+            continue
+        # Listings a scraper returned instead of streaming are exported the same way
+        if listings:
+            export_queue.put(site_name, listings)
+    export_queue.close()
+
+    completed_sites = []
     for site_name in sites:
-        if site_name not in scraper_classes:
-            logger.warning(f"No scraper class found for {site_name}, skipping")
+        if site_name in errors:
             failed_sites += 1
             continue
-        
-        try:
-            logger.info(f"Starting scraper: {site_name}")
-            
-            # Get config for this site
-            config = config_loader.get_config(site_name)
-            
-            # Initialize and run scraper
-            scraper_class = scraper_classes[site_name]
-            scraper = scraper_class(site_name, config)
-            listings = scraper.scrape()
-            
-            # Export results
-            if listings:
-                exporter.export_listings(listings, site_name)
-                logger.info(f"Exported {len(listings)} listings from {site_name}")
-                total_listings += len(listings)
-                successful_sites += 1
+
+        exported = export_queue.counts.get(site_name, 0)
+        if exported:
+            logger.info(f"Exported {exported} listings from {site_name}")
+            total_listings += exported
+            successful_sites += 1
+            if site_name not in crawled_sites:
+                logger.warning(f"{site_name} was not crawled through its last search page without errors, "
+                               f"so its missing listings are not marked delisted")
+            elif site_name in export_queue.failed:
+                logger.warning(f"Some listings from {site_name} failed to export, "
+                               f"so its missing listings are not marked delisted")
             else:
-                logger.warning(f"No listings scraped from {site_name}")
-                failed_sites += 1
-            
-            # Clean up
-            scraper.close()
-            
-        except Exception as e:
-            logger.error(f"Error scraping {site_name}: {e}")
+                completed_sites.append(site_name)
+        else:
+            logger.warning(f"No listings {'exported' if site_name in export_queue.failed else 'scraped'} from {site_name}")
             failed_sites += 1
-            continue
-        
-        # Delay between sites
-        time.sleep(5)
-    
+
+    for domain, rate in rate_limiter.rates().items():
+        logger.info(f"Final request rate for {domain}: {rate:.2f} req/s")
+    # Copies of one property across sites and pages share a property_id in the database
+    if exporter.store is not None and not args.no_dedupe:
+        try:
+            rows = dedupe_store(exporter.store)
+            logger.info(f"Updated the property id of {len(rows)} stored listings")
+            if exporter.tracker is not None:
+                exporter.tracker.set_property_ids(rows)
+        except Exception as e:
+            logger.error(f"Failed to assign property ids: {e}")
+    # Only sites that finished can tell which of their listings are gone
+    if exporter.tracker is not None:
+        try:
+            exporter.export_changes(completed_sites)
+        except Exception as e:
+            logger.error(f"Failed to record changes: {e}")
+    if args.compact_json and args.json_format == 'jsonl':
+        exporter.compact_json()
+    # The workbook is built once per run from the whole CSV history
+    if not args.no_excel and successful_sites:
+        try:
+            exporter.export_excel()
+        except Exception as e:
+            logger.error(f"Failed to write Excel workbook: {e}")
+    exporter.close()
+    if parse_pool is not None:
+        parse_pool.close()
+    if response_cache is not None:
+        response_cache.close()
+    if listing_index is not None:
+        listing_index.close()
+
     # Final summary
     logger.info(f"Finished scraping all sites. Successful: {successful_sites}, Failed: {failed_sites}, Total listings: {total_listings}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
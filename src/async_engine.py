@@ -0,0 +1,196 @@
+import time
+import asyncio
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urljoin, urlparse
+import aiohttp
+from src.parse_pool import parse_search_html, parse_detail_html
+from src.selector_plan import SelectorPlan
+from src.structured_data import StructuredData, complete_detail
+from src.rate_limiter import RateLimiter, parse_retry_after
+from src.utils import setup_logger, async_retry, get_random_user_agent
+
+class AsyncCrawlEngine:
+    """Crawl sites over plain HTTP with coroutines; pages that need JavaScript yield no cards"""
+    def __init__(self, configs, max_connections=200, domain_concurrency=None, parse_executor=None,
+                 response_cache=None, listing_index=None, rate_limiter=None, logger=None, on_listings=None):
+        self.configs = configs
+        self.max_connections = max_connections
+        # Overrides each site's host_concurrency when set
+        self.domain_concurrency = domain_concurrency
+        self.parse_executor = parse_executor
+        self.response_cache = response_cache
+        self.listing_index = listing_index
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.logger = logger or setup_logger('async_engine', 'logs/async_engine.log')
+        self._domain_semaphores = {}
+        self.structured_skips = Counter()
+        # Called with (site_name, listings) as each search page finishes; may block, so it runs off the loop
+        self.on_listings = on_listings
+        self.scraped_counts = Counter()
+        # Search pages per site that could not be fetched; their listings are missing from the results
+        self.failed_pages = Counter()
+        # Search pages per site without listing cards, i.e. past the end of the results
+        self.empty_pages = Counter()
+        # Sites crawled past their last result page without a failed page
+        self.crawled_sites = set()
+
+    def _domain_semaphore(self, url, limit):
+        """Get the semaphore bounding in-flight requests to a domain"""
+        domain = urlparse(url).netloc.lower()
+        if domain not in self._domain_semaphores:
+            self._domain_semaphores[domain] = asyncio.Semaphore(max(1, limit))
+        return self._domain_semaphores[domain]
+
+    async def _parse(self, func, html, config):
+        """Parse in the executor; the config is plain data so a process pool works too"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, func, html, config)
+
+    @async_retry(max_attempts=3, delay=2.0, exceptions=(aiohttp.ClientError, asyncio.TimeoutError))
+    async def fetch(self, session, url, config, headers=None):
+        """Send a GET under the domain's concurrency limit; returns (status, html, headers)"""
+        bucket = self.rate_limiter.bucket(url, config)
+        limit = self.domain_concurrency or config.get('host_concurrency', 1)
+        async with self._domain_semaphore(url, limit):
+            # Pacing comes from the domain's adaptive rate limiter
+            await bucket.acquire_async()
+            started = time.time()
+            timeout = aiohttp.ClientTimeout(total=config.get('timeout', 30))
+            async with session.get(url, headers=headers, timeout=timeout) as response:
+                bucket.record(time.time() - started, response.status, parse_retry_after(response.headers.get('Retry-After')))
+                response.raise_for_status()
+                html = await response.text() if response.status != 304 else None
+                result = (response.status, html, response.headers)
+        return result
+
+    async def fetch_page(self, session, url, config):
+        """Fetch a page and return its HTML"""
+        status, html, headers = await self.fetch(session, url, config)
+        return html
+
+    async def fetch_detail_page(self, session, site_name, url, config):
+        """Fetch a detail page through the response cache, revalidating stale entries"""
+        if self.response_cache is None:
+            return await self.fetch_page(session, url, config)
+
+        cached = self.response_cache.get(url)
+        if cached and cached.is_fresh(config.get('cache_ttl', 86400)):
+            self.response_cache.record(site_name, 'hit')
+            return cached.body
+
+        status, html, headers = await self.fetch(session, url, config, cached.validators() if cached else None)
+        if status == 304 and cached:
+            self.response_cache.touch(url)
+            self.response_cache.record(site_name, 'revalidated')
+            return cached.body
+
+        self.response_cache.put(url, html, site_name,
+                                etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'))
+        self.response_cache.record(site_name, 'miss')
+        return html
+
+    def _search_urls(self, config):
+        """Build search page URLs; later pages need a page_url_template such as "?page={page}" """
+        first_page = urljoin(config['base_url'], config['search_url'])
+        urls = [first_page]
+        template = config.get('page_url_template')
+        if template:
+            for page_num in range(2, config.get('max_pages', 1) + 1):
+                urls.append(first_page + template.format(page=page_num))
+        return urls
+
+    async def crawl_listing(self, session, site_name, config, listing):
+        """Fetch and merge the detail page of one listing"""
+        url = listing.url
+        # Unchanged cards reuse the detail data from the listing index
+        max_age = config.get('detail_refresh_days', 7) * 86400
+        found, listing.structured = listing.structured or {}, None
+        if url and not (self.listing_index and self.listing_index.reuse_detail(listing, site_name, max_age)):
+            full_url = urljoin(config['base_url'], url)
+            try:
+                # Skip the detail page when the search page's structured data covered every field
+                structured_data = StructuredData.for_config(config)
+                if structured_data.enabled and not structured_data.missing_fields(found, SelectorPlan.for_config(config)):
+                    detail_info = complete_detail(found)
+                    self.structured_skips[site_name] += 1
+                else:
+                    html = await self.fetch_detail_page(session, site_name, full_url, config)
+                    detail_info = complete_detail(found, await self._parse(parse_detail_html, html, config))
+                listing.set_detail(detail_info)
+                if self.listing_index is not None:
+                    self.listing_index.record(listing, site_name, detail_info)
+            except Exception as e:
+                self.logger.warning(f"[{site_name}] Failed to fetch detail page {full_url}: {e}")
+                if self.listing_index is not None:
+                    self.listing_index.record(listing, site_name)
+        listing.scraped_at = datetime.now().isoformat()
+        return listing
+
+    async def crawl_search_page(self, session, site_name, config, url):
+        """Fetch one search page and all of its detail pages"""
+        try:
+            html = await self.fetch_page(session, url, config)
+        except Exception as e:
+            self.logger.error(f"[{site_name}] Error fetching search page {url}: {e}")
+            self.failed_pages[site_name] += 1
+            return []
+
+        cards = await self._parse(parse_search_html, html, config)
+        if not cards:
+            self.logger.warning(f"[{site_name}] No listing cards found on {url}")
+            self.empty_pages[site_name] += 1
+            return []
+        self.logger.info(f"[{site_name}] Found {len(cards)} listing cards on {url}")
+
+        listings = await asyncio.gather(*(self.crawl_listing(session, site_name, config, card) for card in cards))
+        return await self._emit(site_name, listings)
+
+    async def _emit(self, site_name, listings):
+        """Pass a finished page to on_listings; returns the listings still to be returned by crawl_site"""
+        self.scraped_counts[site_name] += len(listings)
+        if self.on_listings is None:
+            return listings
+        await asyncio.get_running_loop().run_in_executor(None, self.on_listings, site_name, listings)
+        return []
+
+    async def crawl_site(self, session, site_name, config):
+        """Crawl every search page of a site concurrently"""
+        urls = self._search_urls(config)
+        pages = await asyncio.gather(*(self.crawl_search_page(session, site_name, config, url) for url in urls))
+        listings = [listing for page in pages for listing in page]
+        self.logger.info(f"[{site_name}] Scraped {self.scraped_counts[site_name]} listings")
+        if self.failed_pages[site_name]:
+            self.logger.warning(f"[{site_name}] {self.failed_pages[site_name]} search pages failed")
+        elif self.empty_pages[site_name]:
+            self.crawled_sites.add(site_name)
+        else:
+            # Every page up to max_pages had listings, so the results may go on past it
+            self.logger.info(f"[{site_name}] Results did not end within {len(urls)} search pages")
+        if self.response_cache is not None:
+            self.logger.info(f"[{site_name}] Response cache: {self.response_cache.summary(site_name)}")
+        if self.listing_index is not None:
+            self.logger.info(f"[{site_name}] Listing index: {self.listing_index.summary(site_name)}")
+        if StructuredData.for_config(config).enabled:
+            self.logger.info(f"[{site_name}] Structured data: {self.structured_skips[site_name]} listings needed no detail page")
+        return listings
+
+    async def crawl(self):
+        """Crawl all configured sites; returns {site_name: listings or exception}"""
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        headers = {
+            'User-Agent': get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+            site_names = list(self.configs)
+            results = await asyncio.gather(
+                *(self.crawl_site(session, site_name, self.configs[site_name]) for site_name in site_names),
+                return_exceptions=True
+            )
+        return dict(zip(site_names, results))
+
+    def run(self):
+        """Run the crawl to completion from synchronous code"""
+        return asyncio.run(self.crawl())
@@ -0,0 +1,214 @@
+import os
+import json
+import hashlib
+import sqlite3
+import uuid
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+
+# Change types recorded per listing and run
+NEW, PRICE_CHANGE, UPDATED, DELISTED, RELISTED = 'new', 'price_change', 'updated', 'delisted', 'relisted'
+# Keys per "url IN (...)" lookup, under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS listing_state (
+        site TEXT NOT NULL,
+        url TEXT NOT NULL,
+        property_id TEXT,
+        row_hash TEXT NOT NULL,
+        price_value REAL,
+        status TEXT NOT NULL,
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL,
+        last_run TEXT NOT NULL,
+        PRIMARY KEY (site, url)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS listing_changes (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        changed_at TEXT NOT NULL,
+        site TEXT NOT NULL,
+        url TEXT NOT NULL,
+        property_id TEXT,
+        change TEXT NOT NULL,
+        old_price REAL,
+        new_price REAL,
+        title TEXT,
+        location TEXT
+    );
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id TEXT PRIMARY KEY,
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        summary TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_listing_state_last_run ON listing_state (site, status, last_run);
+    CREATE INDEX IF NOT EXISTS idx_listing_state_property_id ON listing_state (property_id);
+    CREATE INDEX IF NOT EXISTS idx_listing_changes_run_id ON listing_changes (run_id);
+    CREATE INDEX IF NOT EXISTS idx_listing_changes_changed_at ON listing_changes (changed_at);
+    CREATE INDEX IF NOT EXISTS idx_listing_changes_listing ON listing_changes (site, url);
+    CREATE INDEX IF NOT EXISTS idx_listing_changes_property_id ON listing_changes (property_id);
+"""
+
+STATE_UPSERT = (
+    "INSERT INTO listing_state (site, url, row_hash, price_value, status, first_seen, last_seen, last_run) "
+    "VALUES (?, ?, ?, ?, 'active', ?, ?, ?) "
+    "ON CONFLICT(site, url) DO UPDATE SET row_hash = excluded.row_hash, price_value = excluded.price_value, "
+    "status = 'active', last_seen = excluded.last_seen, last_run = excluded.last_run"
+)
+CHANGE_INSERT = (
+    "INSERT INTO listing_changes (run_id, changed_at, site, url, property_id, change, old_price, new_price, title, location) "
+    "VALUES (?, ?, ?, ?, (SELECT property_id FROM listing_state WHERE site = ? AND url = ?), ?, ?, ?, ?, ?)"
+)
+
+def row_hash(listing):
+    """Hash of everything exported for a listing except when it was scraped"""
+    data = listing.to_dict()
+    data.pop('scraped_at', None)
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+class ChangeTracker:
+    """Run-over-run listing changes: one state row per (site, url) and a row per change, never full snapshots"""
+    def __init__(self, path="data/combined/changes.sqlite", logger=None):
+        self.path = path
+        self.logger = logger or logging.getLogger('change_tracker')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Microseconds and a random suffix keep runs started within the same second apart
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute("INSERT INTO runs (run_id, started_at) VALUES (?, ?)",
+                           (self.run_id, datetime.now().isoformat()))
+
+        self.counts = Counter()
+
+    def _previous(self, site, urls):
+        """{url: (row_hash, price_value, status)} for the listings of a site already tracked"""
+        found = {}
+        for start in range(0, len(urls), LOOKUP_CHUNK):
+            chunk = urls[start:start + LOOKUP_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT url, row_hash, price_value, status FROM listing_state "
+                f"WHERE site = ? AND url IN ({', '.join('?' * len(chunk))})",
+                [site] + chunk
+            ).fetchall()
+            found.update((row[0], row[1:]) for row in rows)
+        return found
+
+    def observe(self, listings):
+        """Compare a batch against the stored state and record what changed; returns the number of changes"""
+        now = datetime.now().isoformat()
+        by_site = {}
+        for listing in listings:
+            if listing.url and listing.site:
+                by_site.setdefault(listing.site, []).append(listing)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                states, seen, changes = [], [], []
+                for site, site_listings in by_site.items():
+                    previous = self._previous(site, list({listing.url for listing in site_listings}))
+                    for listing in site_listings:
+                        digest = row_hash(listing)
+                        before = previous.get(listing.url)
+                        previous[listing.url] = (digest, listing.price_value, 'active')
+                        if before is not None and before[0] == digest and before[2] == 'active':
+                            # Unchanged rows only move their last_seen forward
+                            seen.append((now, self.run_id, site, listing.url))
+                            continue
+                        if before is None:
+                            change, old_price = NEW, None
+                        elif before[2] != 'active':
+                            change, old_price = RELISTED, before[1]
+                        elif before[1] != listing.price_value:
+                            change, old_price = PRICE_CHANGE, before[1]
+                        else:
+                            change, old_price = UPDATED, before[1]
+                        states.append((site, listing.url, digest, listing.price_value, now, now, self.run_id))
+                        changes.append((self.run_id, now, site, listing.url, site, listing.url, change,
+                                        old_price, listing.price_value, listing.title, listing.location))
+                        self.counts[change] += 1
+                self._conn.executemany(
+                    "UPDATE listing_state SET last_seen = ?, last_run = ? WHERE site = ? AND url = ?", seen
+                )
+                self._conn.executemany(STATE_UPSERT, states)
+                self._conn.executemany(CHANGE_INSERT, changes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(changes)
+
+    def set_property_ids(self, rows):
+        """Store (property_id, site, url) rows, so changes can also be followed per property"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("UPDATE listing_state SET property_id = ? WHERE site = ? AND url = ?", rows)
+                # Changes of this run were recorded before dedupe had run
+                self._conn.execute(
+                    "UPDATE listing_changes SET property_id = (SELECT s.property_id FROM listing_state s "
+                    "WHERE s.site = listing_changes.site AND s.url = listing_changes.url) WHERE run_id = ?",
+                    (self.run_id,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def finish_run(self, completed_sites):
+        """Mark listings of fully scraped sites that were not seen this run as delisted; returns change counts.
+
+        Sites that failed or were not scraped keep their listings active.
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for site in completed_sites:
+                    cursor = self._conn.execute(
+                        "INSERT INTO listing_changes (run_id, changed_at, site, url, property_id, change, old_price) "
+                        "SELECT ?, ?, site, url, property_id, ?, price_value FROM listing_state "
+                        "WHERE site = ? AND status = 'active' AND last_run != ?",
+                        (self.run_id, now, DELISTED, site, self.run_id)
+                    )
+                    if cursor.rowcount > 0:
+                        self.counts[DELISTED] += cursor.rowcount
+                    self._conn.execute(
+                        "UPDATE listing_state SET status = ? WHERE site = ? AND status = 'active' AND last_run != ?",
+                        (DELISTED, site, self.run_id)
+                    )
+                self._conn.execute(
+                    "UPDATE runs SET finished_at = ?, summary = ? WHERE run_id = ?",
+                    (now, json.dumps(dict(self.counts)), self.run_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(self.counts)
+
+    def changes(self, run_id=None):
+        """Yield the changes recorded in a run (default: this one) as dicts"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT run_id, changed_at, site, url, property_id, change, old_price, new_price, title, location "
+                "FROM listing_changes WHERE run_id = ? ORDER BY id",
+                (run_id or self.run_id,)
+            )
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        for row in rows:
+            yield dict(zip(columns, row))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
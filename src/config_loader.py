@@ -1,10 +1,17 @@
 import json
-import os
+import cssselect
+import soupsieve
+from src.selector_plan import SelectorPlan
+from src.structured_data import StructuredData
+
+# soupsieve rejects pseudo-elements it cannot match, such as a malformed "::attr(", with NotImplementedError
+SELECTOR_ERRORS = (soupsieve.SelectorSyntaxError, cssselect.SelectorError, NotImplementedError)
 
 class ConfigLoader:
     def __init__(self, config_file="config/sites.json"):
         self.config_file = config_file
         self.configs = self._load_configs()
+        self._compile_plans()
     
     def _load_configs(self):
         """Load configurations from JSON file"""
@@ -16,6 +23,29 @@ class ConfigLoader:
         except json.JSONDecodeError:
             raise Exception(f"Invalid JSON in config file: {self.config_file}")
     
+    def _compile_plans(self):
+        """Compile every site's selectors once, so a bad selector fails at startup.
+
+        The compiled plans stay in SelectorPlan's cache, where the scrapers pick them up.
+        """
+        for site_name, config in self.configs.items():
+            try:
+                SelectorPlan.for_config(config)
+                StructuredData.for_config(config)
+            except SELECTOR_ERRORS as e:
+                key = self._invalid_selector_key(config)
+                field = f" field {key}" if key else ""
+                raise Exception(f"Invalid selector for site {site_name}{field}: {e}")
+    
+    def _invalid_selector_key(self, config):
+        """Find which key of a site's selectors fails to compile, if any"""
+        for key, selector in config.get('selectors', {}).items():
+            try:
+                SelectorPlan({key: selector}, config.get('parser', 'bs4'))
+            except SELECTOR_ERRORS:
+                return key
+        return None
+    
     def get_config(self, site_name):
         """Get configuration for a specific site"""
         config = self.configs.get(site_name)
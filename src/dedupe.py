@@ -0,0 +1,162 @@
+import re
+import hashlib
+from collections import defaultdict
+
+# Canonical spellings of street suffixes and directions
+STREET_WORDS = {
+    'street': 'st', 'str': 'st', 'avenue': 'ave', 'av': 'ave', 'road': 'rd', 'boulevard': 'blvd',
+    'place': 'pl', 'drive': 'dr', 'lane': 'ln', 'court': 'ct', 'parkway': 'pkwy', 'terrace': 'ter',
+    'highway': 'hwy', 'square': 'sq', 'plaza': 'plz', 'expressway': 'expy', 'turnpike': 'tpke',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w'
+}
+# "#4B", "Apt 4B", "Unit PH2", "Suite 300"; a unit glued to the next word ("#4Brooklyn") stops at the capital
+UNIT_PATTERN = re.compile(r'(?i:#|\b(?:apt|apartment|unit|suite|ste|fl|floor)\.?\s)\s*([0-9]+[A-Za-z]?|[A-Za-z]{1,2}[0-9]*)(?![a-z0-9])')
+HOUSE_NUMBER_PATTERN = re.compile(r'^\d+(?:-\d+)?[a-z]?\b')
+ZIP_PATTERN = re.compile(r'(?<!\d)(\d{5})(?:-\d{4})?(?!\d)')
+ORDINAL_PATTERN = re.compile(r'\b(\d+)(?:st|nd|rd|th)\b')
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s-]")
+
+# Listings in one block are the same property unless these disagree
+PRICE_TOLERANCE = 0.10
+SQFT_TOLERANCE = 0.10
+# Each listing is compared with this many neighbours by price inside its block, so a
+# block of any size costs linear time
+BLOCK_WINDOW = 50
+
+def address_key(text):
+    """(street, unit, zip) from an address such as "12 W. 5th Street, Apt 4B, Brooklyn, NY 11201".
+
+    The street is the house number plus the canonical street name; None when the
+    text has no house number to anchor on.
+    """
+    if not text:
+        return None
+    street, _, rest = text.partition(',')
+    unit_match = UNIT_PATTERN.search(street)
+    unit = unit_match.group(1).lower() if unit_match else ''
+    if unit_match:
+        street = street[:unit_match.start()]
+    elif rest:
+        unit_match = UNIT_PATTERN.search(rest.split(',')[0])
+        unit = unit_match.group(1).lower() if unit_match else ''
+
+    words = ORDINAL_PATTERN.sub(r'\1', PUNCTUATION_PATTERN.sub(' ', street.lower())).split()
+    street = ' '.join(STREET_WORDS.get(word, word) for word in words)
+    if not HOUSE_NUMBER_PATTERN.match(street):
+        return None
+
+    # Only look for the ZIP after the street, so a five digit house number is not mistaken for one
+    zip_match = ZIP_PATTERN.search(rest) if rest else None
+    return street, unit, zip_match.group(1) if zip_match else ''
+
+def _differs(a, b, tolerance):
+    return a is not None and b is not None and abs(a - b) > tolerance * max(abs(a), abs(b))
+
+def same_property(a, b):
+    """Whether two listings of one block describe the same property; missing values never disagree"""
+    if a['zip'] and b['zip'] and a['zip'] != b['zip']:
+        return False
+    if a['beds'] is not None and b['beds'] is not None and a['beds'] != b['beds']:
+        return False
+    return not _differs(a['sqft'], b['sqft'], SQFT_TOLERANCE) and not _differs(a['price'], b['price'], PRICE_TOLERANCE)
+
+class UnionFind:
+    """Clusters of listing indexes; clusters whose ZIPs or bed counts disagree are never merged"""
+    def __init__(self, records):
+        self.parent = list(range(len(records)))
+        # ZIP and beds of each cluster, kept on its root
+        self.zips = [record['zip'] for record in records]
+        self.beds = [record['beds'] for record in records]
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return
+        # Listings missing a ZIP or bed count match either side, but must not chain two clusters that disagree
+        if self.zips[i] and self.zips[j] and self.zips[i] != self.zips[j]:
+            return
+        if self.beds[i] is not None and self.beds[j] is not None and self.beds[i] != self.beds[j]:
+            return
+        # The lower index, the listing stored first, stays root
+        root, child = min(i, j), max(i, j)
+        self.parent[child] = root
+        self.zips[root] = self.zips[root] or self.zips[child]
+        self.beds[root] = self.beds[root] if self.beds[root] is not None else self.beds[child]
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+def property_ids(listings):
+    """Assign a property id to every listing, the same id for copies of one property across sites and pages.
+
+    Listings are blocked on (street, unit) and only compared within a block, then
+    matches are merged with union-find. Ids hash the street, unit and the cluster's
+    ZIP (empty when no listing in it has one), so a property keeps its id from run
+    to run however its cluster and its neighbours grow; clusters that share all
+    three are told apart by their bed count. Listings without a usable address get
+    an id of their own from site and URL.
+    """
+    records = []
+    blocks = defaultdict(list)
+    for i, listing in enumerate(listings):
+        key = address_key(listing.location) or address_key(listing.title)
+        details = listing.details
+        records.append({
+            'key': key,
+            'zip': key[2] if key else '',
+            'price': _number(listing.price_value),
+            'beds': _number(details.beds) if details else None,
+            'sqft': _number(details.sqft) if details else None
+        })
+        if key:
+            blocks[key[:2]].append(i)
+
+    clusters = UnionFind(records)
+    for members in blocks.values():
+        members.sort(key=lambda i: (records[i]['price'] is None, records[i]['price'] or 0))
+        for n, i in enumerate(members):
+            for j in members[n + 1:n + 1 + BLOCK_WINDOW]:
+                if same_property(records[i], records[j]):
+                    clusters.union(i, j)
+
+    ids = [None] * len(listings)
+    for block, members in blocks.items():
+        roots = defaultdict(list)
+        for i in members:
+            roots[clusters.find(i)].append(i)
+        addresses = defaultdict(list)
+        for root in roots:
+            addresses['|'.join(block + (clusters.zips[root],))].append(root)
+        for name, address_roots in addresses.items():
+            for root in address_roots:
+                # Clusters left with a bed count unknown share the address id
+                beds = clusters.beds[root]
+                cluster_name = f"{name}|beds={beds:g}" if len(address_roots) > 1 and beds is not None else name
+                property_id = hashlib.sha1(cluster_name.encode('utf-8')).hexdigest()[:16]
+                for i in roots[root]:
+                    ids[i] = property_id
+
+    for i, listing in enumerate(listings):
+        if ids[i] is None:
+            ids[i] = hashlib.sha1(f"{listing.site}|{listing.url}".encode('utf-8')).hexdigest()[:16]
+    return ids
+
+def dedupe_store(store):
+    """Assign property ids to every listing in a ListingStore, writing only the ids that changed.
+
+    Returns the changed (property_id, site, url) rows.
+    """
+    records = store.dedupe_records()
+    new_ids = property_ids([listing for listing, _ in records])
+    rows = [(property_id, listing.site, listing.url)
+            for property_id, (listing, old_id) in zip(new_ids, records) if property_id != old_id]
+    if rows:
+        store.set_property_ids(rows)
+    return rows
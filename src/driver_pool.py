@@ -0,0 +1,172 @@
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+class PooledDriver:
+    """A WebDriver leased from a DriverPool, with usage counters"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_loaded = 0
+        self.created_at = time.time()
+        # Network.setBlockedURLs patterns currently applied to this browser
+        self.blocked_patterns = None
+
+class DriverPool:
+    def __init__(self, max_browsers=4, max_pages=100, heap_limit_mb=1024, headless=True, lease_timeout=600):
+        self.max_browsers = max(1, max_browsers)
+        self.max_pages = max_pages
+        # Limit on the loaded page's JS heap (performance.memory), not on Chrome's process memory
+        self.heap_limit_mb = heap_limit_mb
+        self.headless = headless
+        self.lease_timeout = lease_timeout
+        self.logger = logging.getLogger('driver_pool')
+
+        self._condition = threading.Condition()
+        self._idle = []
+        self._live = 0
+        self._closed = False
+        self._driver_path = None
+        self._install_lock = threading.Lock()
+
+        # Counters for the end-of-run summary
+        self.started = 0
+        self.recycled = 0
+
+    def _get_driver_path(self):
+        """Resolve the ChromeDriver executable once per pool"""
+        with self._install_lock:
+            if not self._driver_path:
+                driver_path = Path(ChromeDriverManager().install())
+                # Some webdriver-manager versions return a sibling file instead of the binary
+                if not driver_path.name.startswith('chromedriver') or driver_path.suffix not in ('', '.exe'):
+                    driver_path = driver_path.with_name('chromedriver.exe' if os.name == 'nt' else 'chromedriver')
+                self._driver_path = str(driver_path)
+                self.logger.info(f"Using ChromeDriver executable: {self._driver_path}")
+            return self._driver_path
+
+    def _create_driver(self):
+        """Start a new Chrome WebDriver"""
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option("useAutomationExtension", False)
+        # Return from get() at DOMContentLoaded; SeleniumScraper waits for readiness itself
+        chrome_options.page_load_strategy = 'eager'
+        # CDP Network events in the performance log back the network_idle readiness strategy
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+        service = Service(self._get_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        self.started += 1
+        return PooledDriver(driver)
+
+    def lease(self, timeout=None):
+        """Lease a warm driver, starting a new one if under the browser cap"""
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise Exception("Driver pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.max_browsers:
+                    self._live += 1
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise Exception(f"Timed out after {timeout}s waiting for a WebDriver")
+
+        try:
+            return self._create_driver()
+        except Exception:
+            with self._condition:
+                self._live -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, pooled, reason=None):
+        """Return a driver to the pool, recycling it if unhealthy or worn out"""
+        if pooled is None:
+            return
+
+        reason = reason or self.recycle_reason(pooled)
+        if reason:
+            self.logger.info(f"Recycling WebDriver: {reason}")
+            self.recycled += 1
+            self.discard(pooled)
+            return
+
+        try:
+            # Drop the last page so an idle browser does not hold its DOM
+            pooled.driver.get('about:blank')
+        except Exception:
+            self.discard(pooled)
+            return
+
+        with self._condition:
+            if self._closed:
+                self._quit(pooled)
+                self._live -= 1
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    def discard(self, pooled):
+        """Quit a leased driver without returning it to the pool"""
+        if pooled is None:
+            return
+        self._quit(pooled)
+        with self._condition:
+            self._live -= 1
+            self._condition.notify()
+
+    def recycle_reason(self, pooled):
+        """Health-check a driver; return why it should be recycled, if at all"""
+        if self._closed:
+            return "pool closed"
+        if self.max_pages and pooled.pages_loaded >= self.max_pages:
+            return f"loaded {pooled.pages_loaded} pages"
+        try:
+            if not pooled.driver.window_handles:
+                return "no open windows"
+            heap_mb = self._js_heap_mb(pooled.driver)
+        except Exception as e:
+            return f"failed health check ({e})"
+        if self.heap_limit_mb and heap_mb > self.heap_limit_mb:
+            return f"page JS heap at {heap_mb:.0f} MB"
+        return None
+
+    def _js_heap_mb(self, driver):
+        """Return the JS heap size of the current page in MB"""
+        used = driver.execute_script(
+            "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0"
+        )
+        return (used or 0) / (1024 * 1024)
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Quit every idle driver; leased drivers are quit when released"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+        self.logger.info(f"Driver pool closed. Browsers started: {self.started}, recycled: {self.recycled}")
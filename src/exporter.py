@@ -1,57 +1,115 @@
 import json
 import csv
-import pandas as pd
 import os
+import re
+import uuid
+import queue
+import threading
+import textwrap
 from datetime import datetime
+from openpyxl import Workbook
+from src.listing import CSV_FIELDS, ARROW_FIELDS
+from src.change_tracker import ChangeTracker
+from src.listing_store import ListingStore
+from src.normalizer import normalize_listings
 from src.utils import setup_logger
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Only needed for the Parquet export
+    pa = None
+
+# Rows per worksheet in .xlsx, header included
+EXCEL_MAX_ROWS = 1048576
+# Characters Excel does not allow in sheet names; names are capped at 31 characters
+SHEET_NAME_INVALID = re.compile(r'[\[\]:*?/\\]')
+NUMERIC_COLUMNS = frozenset(name for name, kind in ARROW_FIELDS if kind == 'float64')
+# Parquet dataset directories: <parquet_dir>/site=<site>/scrape_date=<YYYY-MM-DD>/
+PARQUET_PARTITIONS = ('site', 'scrape_date')
+
+def parquet_schema():
+    """Arrow schema of the Parquet export: the ARROW_FIELDS columns plus the scrape_date partition"""
+    return pa.schema([(name, kind) for name, kind in ARROW_FIELDS] + [('scrape_date', 'string')])
+
 class Exporter:
-    def __init__(self, output_dir="data/combined"):
+    def __init__(self, output_dir="data/combined", json_format="jsonl", db_path=None, parquet=False, changes_path=None):
         self.output_dir = output_dir
+        self.json_format = json_format
         self.logger = setup_logger('exporter', 'logs/export.log')
         os.makedirs(output_dir, exist_ok=True)
         
         # Initialize files if they don't exist
         self.json_file = os.path.join(output_dir, "listings.json")
+        self.jsonl_file = os.path.join(output_dir, "listings.jsonl")
         self.csv_file = os.path.join(output_dir, "listings.csv")
         self.excel_file = os.path.join(output_dir, "listings.xlsx")
+        self.parquet_dir = os.path.join(output_dir, "parquet")
+        self.changes_dir = os.path.join(output_dir, "changes")
+        
+        self.parquet = parquet
+        if parquet and pa is None:
+            raise Exception("Parquet export needs pyarrow (pip install pyarrow)")
         
-        # Initialize JSON file with empty array if it doesn't exist
-        if not os.path.exists(self.json_file):
+        # Queryable copy of the latest state of every listing, next to the flat files
+        self.store = ListingStore(db_path, logger=self.logger) if db_path else None
+        # New listings, price changes and delistings since the previous run
+        self.tracker = ChangeTracker(changes_path, logger=self.logger) if changes_path else None
+        
+        if json_format == 'jsonl':
+            # listings.jsonl is the record from now on; carry over an existing JSON array once
+            if os.path.exists(self.json_file) and os.path.getsize(self.json_file) and not os.path.exists(self.jsonl_file):
+                self._migrate_json_to_jsonl()
+        elif not os.path.exists(self.json_file):
+            # Initialize JSON file with empty array if it doesn't exist
             with open(self.json_file, 'w') as f:
                 json.dump([], f)
     
     def export_listings(self, listings, site_name):
-        """Export listings to all formats"""
+        """Export listings to all formats; returns the number exported, raising if any format failed"""
         if not listings:
             self.logger.warning(f"No listings to export for {site_name}")
-            return
+            return 0
         
         # Add site name and timestamp to each listing
         for listing in listings:
-            listing['site'] = site_name
-            listing['scraped_at'] = datetime.now().isoformat()
+            listing.site = site_name
+            listing.scraped_at = datetime.now().isoformat()
+        
+        # Typed price/beds/baths/sqft for the whole batch at once
+        normalize_listings(listings)
         
         try:
-            self._export_to_json(listings)
+            if self.json_format == 'jsonl':
+                self._export_to_jsonl(listings)
+            else:
+                self._export_to_json(listings)
             self._export_to_csv(listings)
-            self._export_to_excel(listings)
+            if self.store is not None:
+                self.store.save(listings)
+            if self.tracker is not None:
+                self.tracker.observe(listings)
+            if self.parquet:
+                self._export_to_parquet(listings)
             self.logger.info(f"Exported {len(listings)} listings from {site_name}")
+            return len(listings)
         except Exception as e:
             self.logger.error(f"Error exporting listings: {e}")
+            raise
     
     def _export_to_json(self, listings):
         """Append listings to JSON file"""
         try:
-            # Read existing data
-            if os.path.exists(self.json_file):
+            # Read existing data; the tracked listings.json starts out as an empty file
+            if os.path.exists(self.json_file) and os.path.getsize(self.json_file) > 0:
                 with open(self.json_file, 'r') as f:
                     existing_data = json.load(f)
             else:
                 existing_data = []
             
             # Append new listings
-            existing_data.extend(listings)
+            existing_data.extend(listing.to_dict() for listing in listings)
             
             # Write back to file
             with open(self.json_file, 'w') as f:
@@ -61,60 +119,256 @@ class Exporter:
             self.logger.error(f"Error exporting to JSON: {e}")
             raise
     
+    def export_changes(self, completed_sites):
+        """Close the run in the change tracker and write its changes to changes/changes-<run>.jsonl"""
+        if self.tracker is None:
+            return {}
+        try:
+            counts = self.tracker.finish_run(completed_sites)
+            os.makedirs(self.changes_dir, exist_ok=True)
+            changes_file = os.path.join(self.changes_dir, f"changes-{self.tracker.run_id}.jsonl")
+            with open(changes_file, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(change) + '\n' for change in self.tracker.changes())
+            self.logger.info(f"Wrote changes of run {self.tracker.run_id} to {changes_file}: {counts}")
+            return counts
+                
+        except Exception as e:
+            self.logger.error(f"Error exporting changes: {e}")
+            raise
+    
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+        if self.tracker is not None:
+            self.tracker.close()
+    
+    def _export_to_jsonl(self, listings):
+        """Append listings to the JSON Lines file in one write, synced to disk before returning"""
+        try:
+            data = ''.join(listing.json_line() + '\n' for listing in listings).encode('utf-8')
+            with open(self.jsonl_file, 'ab') as f:
+                # A crash mid-write can leave a partial last line; start this batch on a fresh one
+                if f.tell() and not self._ends_with_newline():
+                    data = b'\n' + data
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                
+        except Exception as e:
+            self.logger.error(f"Error exporting to JSON Lines: {e}")
+            raise
+    
+    def _ends_with_newline(self):
+        with open(self.jsonl_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    
+    def _migrate_json_to_jsonl(self):
+        """Convert a legacy JSON array export into the JSON Lines file"""
+        try:
+            with open(self.json_file, 'r') as f:
+                existing_data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not read {self.json_file} for JSON Lines migration: {e}")
+            return
+        
+        with open(self.jsonl_file, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(item) + '\n' for item in existing_data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.logger.info(f"Migrated {len(existing_data)} listings from {self.json_file} to {self.jsonl_file}")
+    
+    def compact_json(self):
+        """Rebuild the legacy listings.json array from listings.jsonl, streaming one listing at a time"""
+        if not os.path.exists(self.jsonl_file):
+            return 0
+        
+        count = 0
+        skipped = 0
+        temp_file = f"{self.json_file}.tmp"
+        with open(self.jsonl_file, 'r', encoding='utf-8') as source, open(temp_file, 'w', encoding='utf-8') as target:
+            target.write('[')
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # Torn line from an interrupted write
+                    skipped += 1
+                    continue
+                target.write(',\n' if count else '\n')
+                target.write(textwrap.indent(json.dumps(item, indent=2), '  '))
+                count += 1
+            target.write('\n]' if count else ']')
+            target.flush()
+            os.fsync(target.fileno())
+        
+        # Readers never see a half-written listings.json
+        os.replace(temp_file, self.json_file)
+        if skipped:
+            self.logger.warning(f"Skipped {skipped} unreadable lines in {self.jsonl_file}")
+        self.logger.info(f"Compacted {count} listings into {self.json_file}")
+        return count
+    
+    def _export_to_parquet(self, listings):
+        """Write the batch as zstd-compressed Parquet files under the site and scrape date partitions"""
+        try:
+            records = []
+            for listing in listings:
+                record = listing.arrow_record()
+                record['scrape_date'] = (listing.scraped_at or '')[:10]
+                records.append(record)
+            table = pa.Table.from_pylist(records, schema=parquet_schema())
+            # A fresh file name per batch, so earlier batches of the same day are never overwritten
+            pq.write_to_dataset(
+                table, self.parquet_dir,
+                partition_cols=list(PARQUET_PARTITIONS),
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior='overwrite_or_ignore',
+                compression='zstd'
+            )
+                
+        except Exception as e:
+            self.logger.error(f"Error exporting to Parquet: {e}")
+            raise
+    
     def _export_to_csv(self, listings):
         """Append listings to CSV file"""
         try:
-            # Flatten the listings for CSV
-            flattened = []
-            for listing in listings:
-                flat_listing = {
-                    'site': listing.get('site', ''),
-                    'title': listing.get('title', ''),
-                    'price': listing.get('price', ''),
-                    'location': listing.get('location', ''),
-                    'url': listing.get('url', ''),
-                    'scraped_at': listing.get('scraped_at', ''),
-                    'beds': listing.get('details', {}).get('beds', ''),
-                    'baths': listing.get('details', {}).get('baths', ''),
-                    'sqft': listing.get('details', {}).get('sqft', ''),
-                    'acres': listing.get('details', {}).get('acres', ''),
-                    'property_type': listing.get('details', {}).get('property_type', ''),
-                    'parking': listing.get('details', {}).get('parking', ''),
-                    'garage': listing.get('details', {}).get('garage', ''),
-                    'agent_name': listing.get('agent', {}).get('name', ''),
-                    'agent_license': listing.get('agent', {}).get('license', ''),
-                    'agent_office': listing.get('agent', {}).get('office', ''),
-                    'agent_phone': listing.get('agent', {}).get('phone', '')
-                }
-                flattened.append(flat_listing)
-            
-            # Write to CSV
-            fieldnames = [
-                'site', 'title', 'price', 'location', 'beds', 'baths', 'sqft', 
-                'acres', 'property_type', 'parking', 'garage', 'agent_name', 
-                'agent_license', 'agent_office', 'agent_phone', 'url', 'scraped_at'
-            ]
+            rows = [listing.csv_row() for listing in listings]
             
-            file_exists = os.path.exists(self.csv_file)
+            fieldnames = CSV_FIELDS
+            # An empty file (e.g. a placeholder) has no header yet either
+            has_header = os.path.exists(self.csv_file) and os.path.getsize(self.csv_file) > 0
+            if has_header:
+                # Keep appending in the column layout the file was started with
+                with open(self.csv_file, 'r', newline='', encoding='utf-8') as f:
+                    fieldnames = tuple(next(csv.reader(f), None) or CSV_FIELDS)
             
             with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                if not file_exists:
-                    writer.writeheader()
-                writer.writerows(flattened)
+                if fieldnames == CSV_FIELDS:
+                    writer = csv.writer(f)
+                    if not has_header:
+                        writer.writerow(CSV_FIELDS)
+                    writer.writerows(rows)
+                else:
+                    writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                    writer.writerows(dict(zip(CSV_FIELDS, row)) for row in rows)
                 
         except Exception as e:
             self.logger.error(f"Error exporting to CSV: {e}")
             raise
     
-    def _export_to_excel(self, listings):
-        """Export listings to Excel file (overwrites existing file)"""
+    def export_excel(self):
+        """Write listings.xlsx from the full CSV history in one pass, one sheet per site.
+
+        Rows are streamed from the CSV into a write-only workbook, so memory stays
+        flat however long the history is. A site with more rows than a sheet holds
+        continues on "<site> (2)", "<site> (3)", ...
+        """
+        if not os.path.exists(self.csv_file):
+            return 0
+        
         try:
-            # Read existing CSV and convert to Excel
-            if os.path.exists(self.csv_file):
-                df = pd.read_csv(self.csv_file)
-                df.to_excel(self.excel_file, index=False)
+            workbook = Workbook(write_only=True)
+            sheets = {}
+            count = 0
+            with open(self.csv_file, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    return 0
+                site_column = header.index('site') if 'site' in header else None
+                numeric = [i for i, name in enumerate(header) if name in NUMERIC_COLUMNS]
+                
+                for row in reader:
+                    if not row:
+                        continue
+                    site = row[site_column] if site_column is not None and site_column < len(row) else ''
+                    sheet = sheets.get(site)
+                    if sheet is None or sheet['rows'] >= EXCEL_MAX_ROWS:
+                        part = sheet['part'] + 1 if sheet else 1
+                        sheet = sheets[site] = {
+                            'sheet': workbook.create_sheet(self._sheet_name(site, part, workbook.sheetnames)),
+                            'rows': 1,
+                            'part': part
+                        }
+                        sheet['sheet'].append(header)
+                    for i in numeric:
+                        if i < len(row):
+                            row[i] = self._excel_number(row[i])
+                    sheet['sheet'].append(row)
+                    sheet['rows'] += 1
+                    count += 1
+            
+            if not sheets:
+                workbook.create_sheet('listings').append(header)
+            # Saved under a temp name so an interrupted save keeps the previous workbook
+            temp_file = f"{self.excel_file}.tmp"
+            workbook.save(temp_file)
+            os.replace(temp_file, self.excel_file)
+            self.logger.info(f"Wrote {count} listings across {len(workbook.sheetnames)} sheets to {self.excel_file}")
+            return count
                 
         except Exception as e:
             self.logger.error(f"Error exporting to Excel: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    @staticmethod
+    def _sheet_name(site, part, taken):
+        suffix = f" ({part})" if part > 1 else ""
+        base = SHEET_NAME_INVALID.sub('_', site or 'unknown').strip("'")[:31 - len(suffix)] or 'unknown'
+        name = base + suffix
+        # Truncation can make two site names collide
+        n = 2
+        while name in taken:
+            tag = f"~{n}"
+            name = base[:31 - len(suffix) - len(tag)] + tag + suffix
+            n += 1
+        return name
+    
+    @staticmethod
+    def _excel_number(value):
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return value
+
+class ExportQueue:
+    """Export listings from any thread in bounded batches, written by one writer thread.
+
+    put() blocks while max_batches batches are waiting, so a crawl that outpaces
+    the disk slows down instead of holding its listings in memory. counts holds
+    the listings written per site; sites with a batch that failed are in failed.
+    """
+    def __init__(self, exporter, batch_size=200, max_batches=8):
+        self.exporter = exporter
+        self.batch_size = max(1, batch_size)
+        self.counts = {}
+        self.failed = set()
+        self._queue = queue.Queue(maxsize=max(1, max_batches))
+        self._thread = threading.Thread(target=self._run, name='exporter', daemon=True)
+        self._thread.start()
+    
+    def put(self, site_name, listings):
+        for start in range(0, len(listings), self.batch_size):
+            self._queue.put((site_name, listings[start:start + self.batch_size]))
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            site_name, batch = item
+            try:
+                exported = self.exporter.export_listings(batch, site_name)
+                self.counts[site_name] = self.counts.get(site_name, 0) + exported
+            except Exception as e:
+                self.exporter.logger.error(f"Error exporting batch from {site_name}: {e}")
+                self.failed.add(site_name)
+    
+    def close(self):
+        """Write everything still queued, then stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
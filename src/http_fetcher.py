@@ -0,0 +1,58 @@
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.rate_limiter import parse_retry_after
+from src.utils import get_random_user_agent
+
+# Responses retried through the domain's rate limiter, which backs off on them first
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class HttpFetcher:
+    def __init__(self, timeout=30, pool_size=10, max_attempts=3, logger=None):
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.logger = logger or logging.getLogger('http_fetcher')
+
+        # Keep-alive connections are pooled per host and reused across requests. urllib3 only
+        # retries connection errors; retrying on status is left to get() so it goes through the rate limiter
+        retries = Retry(total=2, backoff_factor=1.0, allowed_methods=['GET', 'HEAD'],
+                        respect_retry_after_header=False, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'User-Agent': get_random_user_agent(),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9'
+        })
+
+    def get(self, url, headers=None, timeout=None, bucket=None):
+        """Send a GET request and return the response; a 304 is not an error.
+
+        429 and 5xx responses are retried up to max_attempts times. Every attempt
+        waits for the domain's rate limiter and reports back to it, so the limiter
+        slows down (and honours Retry-After) before the next try.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            if bucket is not None:
+                bucket.acquire()
+            started = time.time()
+            response = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+            if bucket is not None:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                bucket.record(time.time() - started, response.status_code, retry_after)
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_attempts:
+                break
+            self.logger.info(f"HTTP {response.status_code} from {url}, retrying ({attempt}/{self.max_attempts})")
+            # Without a limiter there is nothing pacing the retry
+            if bucket is None:
+                time.sleep(parse_retry_after(response.headers.get('Retry-After')) or attempt)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
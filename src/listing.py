@@ -0,0 +1,143 @@
+import json
+
+# Column order of the CSV export
+CSV_FIELDS = (
+    'site', 'title', 'price', 'price_value', 'location', 'beds', 'baths', 'sqft',
+    'acres', 'property_type', 'parking', 'garage', 'agent_name',
+    'agent_license', 'agent_office', 'agent_phone', 'url', 'scraped_at'
+)
+
+# Flat columns of an Arrow record and their types
+ARROW_FIELDS = (
+    ('site', 'string'), ('title', 'string'), ('price', 'string'), ('price_value', 'float64'),
+    ('location', 'string'), ('url', 'string'), ('image_url', 'string'), ('scraped_at', 'string'),
+    ('beds', 'float64'), ('baths', 'float64'), ('sqft', 'float64'), ('acres', 'float64'),
+    ('parking', 'string'), ('garage', 'string'), ('property_type', 'string'),
+    ('agent_name', 'string'), ('agent_license', 'string'), ('agent_office', 'string'), ('agent_phone', 'string')
+)
+
+class Record:
+    """Shared dict codec and comparison for the __slots__ record types below"""
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Details(Record):
+    """Property facts from a detail page; beds/baths/sqft/acres are floats once normalized"""
+    __slots__ = ('beds', 'baths', 'sqft', 'acres', 'parking', 'garage', 'property_type')
+
+    def __init__(self, beds=None, baths=None, sqft=None, acres=None, parking="", garage="", property_type=""):
+        self.beds = beds
+        self.baths = baths
+        self.sqft = sqft
+        self.acres = acres
+        self.parking = parking
+        self.garage = garage
+        self.property_type = property_type
+
+class Agent(Record):
+    """Listing agent from a detail page"""
+    __slots__ = ('name', 'license', 'office', 'phone')
+
+    def __init__(self, name="", license="", office="", phone=""):
+        self.name = name
+        self.license = license
+        self.office = office
+        self.phone = phone
+
+class Listing(Record):
+    """One scraped listing: card fields, optional detail data and export metadata"""
+    __slots__ = ('site', 'title', 'price', 'price_value', 'location', 'url', 'image_url', 'scraped_at',
+                 'details', 'agent', 'structured')
+
+    def __init__(self, site="", title="", price="", price_value=None, location="", url=None, image_url=None,
+                 scraped_at=None, details=None, agent=None, structured=None):
+        self.site = site
+        self.title = title
+        self.price = price
+        self.price_value = price_value
+        self.location = location
+        self.url = url
+        self.image_url = image_url
+        self.scraped_at = scraped_at
+        self.details = details
+        self.agent = agent
+        # Detail values read from the search page's structured data; never exported
+        self.structured = structured
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a listing from its dict form, e.g. a line of an earlier JSON export"""
+        listing = cls(**{field: data[field] for field in cls.__slots__ if field in data and field not in ('details', 'agent')})
+        listing.set_detail(data)
+        return listing
+
+    def to_dict(self):
+        return {
+            'site': self.site,
+            'title': self.title,
+            'price': self.price,
+            'price_value': self.price_value,
+            'location': self.location,
+            'url': self.url,
+            'image_url': self.image_url,
+            'scraped_at': self.scraped_at,
+            'details': self.details.to_dict() if self.details is not None else None,
+            'agent': self.agent.to_dict() if self.agent is not None else None
+        }
+
+    def copy(self):
+        listing = Listing.__new__(Listing)
+        for field in self.__slots__:
+            setattr(listing, field, getattr(self, field))
+        return listing
+
+    def set_detail(self, detail_info):
+        """Take the details/agent dicts parsed from a detail page (or stored in the listing index)"""
+        if detail_info.get('details') is not None:
+            self.details = Details.from_dict(detail_info['details'])
+        if detail_info.get('agent') is not None:
+            self.agent = Agent.from_dict(detail_info['agent'])
+
+    def csv_row(self):
+        """Values in CSV_FIELDS order"""
+        details = self.details or EMPTY_DETAILS
+        agent = self.agent or EMPTY_AGENT
+        return (
+            self.site, self.title, self.price, self.price_value, self.location,
+            details.beds, details.baths, details.sqft, details.acres,
+            details.property_type, details.parking, details.garage,
+            agent.name, agent.license, agent.office, agent.phone,
+            self.url, self.scraped_at
+        )
+
+    def json_line(self):
+        return json.dumps(self.to_dict())
+
+    def arrow_record(self):
+        """Flat typed values keyed by ARROW_FIELDS names"""
+        details = self.details or EMPTY_DETAILS
+        agent = self.agent or EMPTY_AGENT
+        return {
+            'site': self.site, 'title': self.title, 'price': self.price, 'price_value': self.price_value,
+            'location': self.location, 'url': self.url, 'image_url': self.image_url, 'scraped_at': self.scraped_at,
+            'beds': details.beds, 'baths': details.baths, 'sqft': details.sqft, 'acres': details.acres,
+            'parking': details.parking, 'garage': details.garage, 'property_type': details.property_type,
+            'agent_name': agent.name, 'agent_license': agent.license,
+            'agent_office': agent.office, 'agent_phone': agent.phone
+        }
+
+# Stand-ins for listings without detail data
+EMPTY_DETAILS = Details(parking=None, garage=None, property_type=None)
+EMPTY_AGENT = Agent(name=None, license=None, office=None, phone=None)
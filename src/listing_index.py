@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import defaultdict
+
+# Card fields that identify a change worth refetching the detail page for
+FINGERPRINT_FIELDS = ('title', 'price', 'location', 'image_url')
+
+def card_fingerprint(listing):
+    """Hash the card-level fields of a listing"""
+    values = '\x1f'.join(str(getattr(listing, field) or '') for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()
+
+class ListingIndex:
+    def __init__(self, path="data/index/listings.sqlite", logger=None):
+        self.path = path
+        self.logger = logger or logging.getLogger('listing_index')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen_listings (
+                url TEXT PRIMARY KEY,
+                site TEXT,
+                fingerprint TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                last_detail_fetch REAL,
+                detail TEXT
+            )
+        """)
+        self._conn.commit()
+
+        # Per-site counters: reused (detail fetch skipped), fetched (new or changed)
+        self.stats = defaultdict(lambda: {'reused': 0, 'fetched': 0})
+
+    def reuse_detail(self, listing, site, max_age):
+        """Carry the previous detail data into an unchanged listing; True if the detail fetch can be skipped"""
+        url = listing.url
+        if not url:
+            return False
+        fingerprint = card_fingerprint(listing)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, last_detail_fetch, detail FROM seen_listings WHERE url = ?", (url,)
+            ).fetchone()
+            if not row or row[0] != fingerprint or not row[2] or now - (row[1] or 0) > max_age:
+                self.stats[site]['fetched'] += 1
+                return False
+            self._conn.execute("UPDATE seen_listings SET last_seen = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+            self.stats[site]['reused'] += 1
+        listing.set_detail(json.loads(row[2]))
+        return True
+
+    def record(self, listing, site, detail_info=None):
+        """Record a listing as seen, with its freshly fetched detail data if any"""
+        url = listing.url
+        if not url:
+            return
+        now = time.time()
+        with self._lock:
+            if detail_info:
+                self._conn.execute(
+                    "INSERT INTO seen_listings (url, site, fingerprint, last_seen, last_detail_fetch, detail) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET site = excluded.site, fingerprint = excluded.fingerprint, "
+                    "last_seen = excluded.last_seen, last_detail_fetch = excluded.last_detail_fetch, "
+                    "detail = excluded.detail",
+                    (url, site, card_fingerprint(listing), now, now, json.dumps(detail_info))
+                )
+            else:
+                # Without new detail data keep the old fingerprint so the next run refetches
+                self._conn.execute(
+                    "INSERT INTO seen_listings (url, site, fingerprint, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen",
+                    (url, site, card_fingerprint(listing), now)
+                )
+            self._conn.commit()
+
+    def summary(self, site):
+        stats = self.stats[site]
+        return f"{stats['reused']} unchanged (detail reused), {stats['fetched']} new or changed"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
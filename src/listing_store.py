@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import logging
+import threading
+from src.listing import Listing, Details, Agent
+
+LISTING_COLUMNS = ('site', 'url', 'title', 'price', 'price_value', 'location', 'image_url', 'scraped_at')
+DETAIL_COLUMNS = Details.__slots__
+AGENT_COLUMNS = Agent.__slots__
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS listings (
+        id INTEGER PRIMARY KEY,
+        site TEXT NOT NULL,
+        url TEXT NOT NULL,
+        title TEXT,
+        price TEXT,
+        price_value REAL,
+        location TEXT,
+        image_url TEXT,
+        first_seen TEXT,
+        scraped_at TEXT,
+        property_id TEXT,
+        UNIQUE (site, url)
+    );
+    CREATE TABLE IF NOT EXISTS listing_details (
+        listing_id INTEGER PRIMARY KEY REFERENCES listings(id) ON DELETE CASCADE,
+        beds REAL,
+        baths REAL,
+        sqft REAL,
+        acres REAL,
+        parking TEXT,
+        garage TEXT,
+        property_type TEXT
+    );
+    CREATE TABLE IF NOT EXISTS listing_agents (
+        listing_id INTEGER PRIMARY KEY REFERENCES listings(id) ON DELETE CASCADE,
+        name TEXT,
+        license TEXT,
+        office TEXT,
+        phone TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_listings_site ON listings (site);
+    CREATE INDEX IF NOT EXISTS idx_listings_price_value ON listings (price_value);
+    CREATE INDEX IF NOT EXISTS idx_listings_scraped_at ON listings (scraped_at);
+    CREATE INDEX IF NOT EXISTS idx_listing_details_property_type ON listing_details (property_type);
+"""
+
+LISTING_UPSERT = (
+    "INSERT INTO listings (site, url, title, price, price_value, location, image_url, scraped_at, first_seen) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(site, url) DO UPDATE SET title = excluded.title, price = excluded.price, "
+    "price_value = excluded.price_value, location = excluded.location, image_url = excluded.image_url, "
+    "scraped_at = excluded.scraped_at"
+)
+# Child rows look up their listing id by (site, url), so a batch needs no id round trip
+DETAIL_UPSERT = (
+    "INSERT INTO listing_details (listing_id, beds, baths, sqft, acres, parking, garage, property_type) "
+    "VALUES ((SELECT id FROM listings WHERE site = ? AND url = ?), ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(listing_id) DO UPDATE SET beds = excluded.beds, baths = excluded.baths, sqft = excluded.sqft, "
+    "acres = excluded.acres, parking = excluded.parking, garage = excluded.garage, "
+    "property_type = excluded.property_type"
+)
+AGENT_UPSERT = (
+    "INSERT INTO listing_agents (listing_id, name, license, office, phone) "
+    "VALUES ((SELECT id FROM listings WHERE site = ? AND url = ?), ?, ?, ?, ?) "
+    "ON CONFLICT(listing_id) DO UPDATE SET name = excluded.name, license = excluded.license, "
+    "office = excluded.office, phone = excluded.phone"
+)
+
+class ListingStore:
+    """Listings in SQLite, one row per (site, url), updated in place on every export"""
+    def __init__(self, path="data/combined/listings.sqlite", logger=None):
+        self.path = path
+        self.logger = logger or logging.getLogger('listing_store')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Transactions are opened explicitly so each batch takes the write lock up front
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        # Databases created before property ids were assigned
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(listings)")]
+        if 'property_id' not in columns:
+            self._conn.execute("ALTER TABLE listings ADD COLUMN property_id TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_property_id ON listings (property_id)")
+
+    def save(self, listings):
+        """Upsert a batch of listings in one transaction; returns the number stored"""
+        listing_rows, detail_rows, agent_rows = [], [], []
+        skipped = 0
+        for listing in listings:
+            if not listing.url or not listing.site:
+                skipped += 1
+                continue
+            listing_rows.append(tuple(getattr(listing, column) for column in LISTING_COLUMNS) + (listing.scraped_at,))
+            # Listings scraped without detail data keep the details stored earlier
+            if listing.details is not None:
+                detail_rows.append((listing.site, listing.url) + tuple(getattr(listing.details, column) for column in DETAIL_COLUMNS))
+            if listing.agent is not None:
+                agent_rows.append((listing.site, listing.url) + tuple(getattr(listing.agent, column) for column in AGENT_COLUMNS))
+        if skipped:
+            self.logger.warning(f"Not storing {skipped} listings without a site and URL")
+        if not listing_rows:
+            return 0
+
+        with self._lock:
+            # BEGIN IMMEDIATE waits for other writers instead of failing when a read lock is upgraded
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(LISTING_UPSERT, listing_rows)
+                self._conn.executemany(DETAIL_UPSERT, detail_rows)
+                self._conn.executemany(AGENT_UPSERT, agent_rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(listing_rows)
+
+    def query(self, site=None, location=None, property_type=None, min_price=None, max_price=None, since=None, limit=None):
+        """Stored listings matching every given filter, newest first"""
+        clauses, params = [], []
+        for clause, value in (
+            ("l.site = ?", site),
+            ("l.location LIKE ?", f"%{location}%" if location else None),
+            ("d.property_type = ?", property_type),
+            ("l.price_value >= ?", min_price),
+            ("l.price_value <= ?", max_price),
+            ("l.scraped_at >= ?", since)
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = (
+            f"SELECT {', '.join('l.' + column for column in LISTING_COLUMNS)}, d.listing_id, "
+            f"{', '.join('d.' + column for column in DETAIL_COLUMNS)}, a.listing_id, "
+            f"{', '.join('a.' + column for column in AGENT_COLUMNS)} "
+            "FROM listings l "
+            "LEFT JOIN listing_details d ON d.listing_id = l.id "
+            "LEFT JOIN listing_agents a ON a.listing_id = l.id"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY l.scraped_at DESC, l.id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        listings = []
+        detail_start = len(LISTING_COLUMNS) + 1
+        agent_start = detail_start + len(DETAIL_COLUMNS) + 1
+        for row in rows:
+            listing = Listing(**dict(zip(LISTING_COLUMNS, row)))
+            if row[detail_start - 1] is not None:
+                listing.details = Details(*row[detail_start:agent_start - 1])
+            if row[agent_start - 1] is not None:
+                listing.agent = Agent(*row[agent_start:])
+            listings.append(listing)
+        return listings
+
+    def dedupe_records(self):
+        """(listing, property_id) for every stored listing, in insertion order, with only the fields dedupe reads"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT l.site, l.url, l.title, l.price_value, l.location, l.property_id, d.beds, d.sqft "
+                "FROM listings l LEFT JOIN listing_details d ON d.listing_id = l.id ORDER BY l.id"
+            ).fetchall()
+        records = []
+        for site, url, title, price_value, location, property_id, beds, sqft in rows:
+            details = Details(beds=beds, sqft=sqft) if beds is not None or sqft is not None else None
+            listing = Listing(site=site, url=url, title=title, price_value=price_value, location=location, details=details)
+            records.append((listing, property_id))
+        return records
+
+    def set_property_ids(self, rows):
+        """Store (property_id, site, url) rows in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("UPDATE listings SET property_id = ? WHERE site = ? AND url = ?", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
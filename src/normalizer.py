@@ -0,0 +1,43 @@
+from src.utils import NUMBER_PATTERN
+
+# Detail fields stored as numbers
+NUMERIC_DETAIL_FIELDS = ('beds', 'baths', 'sqft', 'acres')
+
+def to_numbers(values):
+    """Convert a column of raw texts (or numbers) to floats, None where there is no number"""
+    search = NUMBER_PATTERN.search
+    numbers = []
+    for value in values:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers.append(float(value))
+            continue
+        match = search(value) if value else None
+        numbers.append(float(match.group().replace(',', '')) if match else None)
+    return numbers
+
+def format_prices(values, texts):
+    """Display strings such as "$1,250,000"; prices without a number keep their text"""
+    return [f"${value:,.0f}" if value is not None else (text or "") for value, text in zip(values, texts)]
+
+def normalize_listings(listings):
+    """Normalize a batch of listings column by column, in place.
+
+    Adds a numeric price_value next to the formatted price and turns the
+    numeric detail fields into floats. Already normalized listings are left
+    as they are, so a batch can safely be normalized twice.
+    """
+    if not listings:
+        return listings
+
+    prices = [listing.price for listing in listings]
+    price_values = to_numbers(prices)
+    for listing, value, display in zip(listings, price_values, format_prices(price_values, prices)):
+        listing.price_value = value
+        listing.price = display
+
+    details = [listing.details for listing in listings if listing.details is not None]
+    for field in NUMERIC_DETAIL_FIELDS:
+        column = to_numbers([getattr(detail, field) for detail in details])
+        for detail, value in zip(details, column):
+            setattr(detail, field, value)
+    return listings
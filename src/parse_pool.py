@@ -0,0 +1,65 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from src.parser import Parser
+from src.selector_plan import SelectorPlan
+from src.structured_data import StructuredData, complete_detail
+
+def parse_search_html(html, config):
+    """Parse a search page into plain listing dicts, with any structured data attached (runs in a parse worker)"""
+    # One tree serves both the selectors and the structured data scripts
+    plan = SelectorPlan.for_config(config)
+    document = plan.document(html)
+    cards = Parser.parse_search_page(document, plan)
+    return StructuredData.for_config(config).apply_to_cards(document, cards, plan)
+
+def parse_detail_html(html, config):
+    """Parse a detail page into a details/agent dict, preferring structured data (runs in a parse worker)"""
+    plan = SelectorPlan.for_config(config)
+    document = plan.document(html)
+    parsed = Parser.parse_listing_detail(document, plan)
+    found = StructuredData.for_config(config).detail_page(document, plan)
+    return complete_detail(found, parsed)
+
+class ParsePool:
+    """Parse raw HTML into plain dicts in worker processes, with a bound on pages waiting to be parsed"""
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        # Spawned workers: forking a process that runs Selenium threads is not safe
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(self, func, html, config):
+        """Queue a page for parsing, blocking while max_pending pages are already waiting"""
+        self._slots.acquire()
+        try:
+            # Workers get the plain site config and compile their own selector plan once
+            future = self.executor.submit(func, html, config)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def parse_search_page(self, html, config):
+        return self.submit(parse_search_html, html, config)
+
+    def parse_listing_detail(self, html, config):
+        return self.submit(parse_detail_html, html, config)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+def completed(func, *args):
+    """Run func inline and wrap its result in a finished Future, for callers without a ParsePool"""
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
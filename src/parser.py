@@ -1,103 +1,97 @@
-from bs4 import BeautifulSoup
-from src.utils import clean_text, format_price, extract_number
+from src.listing import Listing
+from src.selector_plan import SelectorPlan, DETAIL_SPECS, AGENT_SPECS
+
+# Values used when a card field is missing
+CARD_DEFAULTS = {
+    'title': "No title",
+    'price': "Price not available",
+    'location': "Location not available"
+}
 
 class Parser:
     @staticmethod
-    def parse_listing_card(card_html, selectors):
-        """Parse a single listing card with enhanced error handling"""
-        soup = BeautifulSoup(card_html, 'lxml')
-        listing = {}
-        
+    def parse_listing_card(card, selectors):
+        """Parse a single listing card, given as a parsed node or as HTML, with enhanced error handling"""
+        plan = SelectorPlan.for_selectors(selectors)
+        soup = plan.document(card) if isinstance(card, str) else card
+        # Extract basic information with fallbacks
+        listing = Listing(**CARD_DEFAULTS)
+
         try:
-            # Extract basic information with fallbacks
-            listing['title'] = clean_text(Parser._extract_text(soup, selectors.get('product_title'))) or "No title"
-            listing['price'] = format_price(Parser._extract_text(soup, selectors.get('price'))) or "Price not available"
-            listing['location'] = clean_text(Parser._extract_text(soup, selectors.get('location'))) or "Location not available"
-            
-            # Extract URL with multiple fallback strategies
-            url_selector = selectors.get('product_link')
-            if url_selector:
-                link = soup.select_one(url_selector)
-                if link:
-                    href = link.get('href')
-                    if href:
-                        # Handle relative URLs
-                        if href.startswith('/'):
-                            base_url = selectors.get('base_url', '')
-                            listing['url'] = f"{base_url}{href}" if base_url else href
-                        else:
-                            listing['url'] = href
-            
-            # Extract image URL with multiple strategies
-            image_selector = selectors.get('image_url')
-            if image_selector:
-                if '::attr(src)' in image_selector:
-                    selector = image_selector.replace('::attr(src)', '')
-                    img = soup.select_one(selector)
-                    if img:
-                        src = img.get('src') or img.get('data-src') or img.get('data-original')
-                        if src:
-                            listing['image_url'] = src
-                else:
-                    img = soup.select_one(image_selector)
-                    if img:
-                        src = img.get('src') or img.get('data-src') or img.get('data-original')
-                        if src:
-                            listing['image_url'] = src
-            
+            for rule in plan.card_rules.values():
+                value = rule.value(soup)
+                if rule.field in CARD_DEFAULTS:
+                    setattr(listing, rule.field, value or CARD_DEFAULTS[rule.field])
+                elif value:
+                    setattr(listing, rule.field, value)
+
+            # Handle relative URLs
+            href = listing.url
+            if href and href.startswith('/') and plan.base_url:
+                listing.url = f"{plan.base_url}{href}"
+
             return listing
-            
+
         except Exception as e:
             print(f"Error parsing listing card: {e}")
             return listing  # Return whatever we managed to parse
-    
+
     @staticmethod
     def parse_listing_detail(detail_html, selectors):
         """Parse detailed listing information from a detail page"""
-        soup = BeautifulSoup(detail_html, 'lxml')
+        plan = SelectorPlan.for_selectors(selectors)
+        soup = plan.document(detail_html)
+
+        # Fields without a selector are normalized from "" (None for numbers, "" for text)
         details = {}
-        
-        # Extract property details
-        details['beds'] = extract_number(Parser._extract_text(soup, selectors.get('beds')))
-        details['baths'] = extract_number(Parser._extract_text(soup, selectors.get('baths')))
-        details['sqft'] = extract_number(Parser._extract_text(soup, selectors.get('sqft')))
-        details['acres'] = extract_number(Parser._extract_text(soup, selectors.get('acres')))
-        details['parking'] = clean_text(Parser._extract_text(soup, selectors.get('parking')))
-        details['garage'] = clean_text(Parser._extract_text(soup, selectors.get('garage')))
-        details['property_type'] = clean_text(Parser._extract_text(soup, selectors.get('property_type')))
-        
-        # Extract agent information
+        for key, (field, normalizer, attrs) in DETAIL_SPECS.items():
+            rule = plan.detail_rules.get(key)
+            details[field] = rule.value(soup) if rule else normalizer("")
+
         agent = {}
-        agent['name'] = clean_text(Parser._extract_text(soup, selectors.get('agent_name')))
-        agent['license'] = clean_text(Parser._extract_text(soup, selectors.get('agent_license')))
-        agent['office'] = clean_text(Parser._extract_text(soup, selectors.get('agent_office')))
-        agent['phone'] = clean_text(Parser._extract_text(soup, selectors.get('agent_phone')))
-        
+        for key, (field, normalizer, attrs) in AGENT_SPECS.items():
+            rule = plan.agent_rules.get(key)
+            agent[field] = rule.value(soup) if rule else normalizer("")
+
         return {
             'details': details,
             'agent': agent
         }
-    
-    @staticmethod
-    def _extract_text(soup, selector):
-        """Extract text using CSS selector"""
-        if not selector:
-            return ""
-        element = soup.select_one(selector)
-        return element.get_text(strip=True) if element else ""
-    
+
     @staticmethod
     def extract_listing_cards(html, selectors):
         """Extract all listing cards from search results page"""
-        soup = BeautifulSoup(html, 'lxml')
-        list_container = selectors.get('list_container')
-        product_card = selectors.get('product_card')
-        
-        if not list_container or not product_card:
+        plan = SelectorPlan.for_selectors(selectors)
+        soup = plan.document(html)
+
+        if not plan.list_container or not plan.product_card:
             return []
-        
-        container = soup.select_one(list_container)
-        if not container:
+
+        container = plan.list_container.select_one(soup)
+        if container is None:
             return []
-        
-        return container.select(product_card)
\ No newline at end of file
+
+        return plan.product_card.select(container)
+
+    @staticmethod
+    def parse_search_page(html, selectors):
+        """Parse every listing card on a search results page (HTML, or the plan's parsed tree) from a single tree"""
+        cards = Parser.extract_listing_cards(html, selectors)
+        listings = [Parser.parse_listing_card(card, selectors) for card in cards]
+        return [listing for listing in listings if listing]
+
+    @staticmethod
+    def selectors_match(html, selectors, page_type):
+        """Check whether a page has the elements the site selectors expect"""
+        plan = SelectorPlan.for_selectors(selectors)
+        soup = plan.document(html)
+        if page_type == 'search':
+            # The container and at least one card must be present
+            if not plan.list_container or not plan.product_card:
+                return False
+            container = plan.list_container.select_one(soup)
+            return container is not None and plan.product_card.select_one(container) is not None
+
+        # Detail pages match when any detail field is present
+        rules = list(plan.detail_rules.values()) + list(plan.agent_rules.values())
+        return any(rule.select_one(soup) is not None for rule in rules)
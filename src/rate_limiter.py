@@ -0,0 +1,103 @@
+import time
+import asyncio
+import logging
+import threading
+from urllib.parse import urlparse
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header, if given as a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token bucket whose rate adapts AIMD-style to how the site responds"""
+    def __init__(self, requests_per_second=0.5, burst=2, min_rps=0.05, max_rps=2.0,
+                 increase=0.05, decrease=0.5, slow_factor=2.0, cooldown=5.0, name=''):
+        self.rate = requests_per_second
+        self.burst = max(1, burst)
+        self.min_rps = min_rps
+        self.max_rps = max(max_rps, requests_per_second)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.cooldown = cooldown
+        self.name = name
+        self.logger = logging.getLogger('rate_limiter')
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._latency = None
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokens may go negative: each caller queues behind the ones before it
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record(self, latency, status=None, retry_after=None):
+        """Adapt the rate from a response: back off on 429/5xx or slow responses, speed up otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            throttled = status is not None and (status == 429 or status >= 500)
+            slow = self._latency is not None and latency > self.slow_factor * self._latency
+
+            if throttled or slow:
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                # One multiplicative decrease per cooldown, so a burst of errors does not collapse the rate
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    old_rate = self.rate
+                    self.rate = max(self.min_rps, self.rate * self.decrease)
+                    reason = f"HTTP {status}" if throttled else f"latency {latency:.1f}s"
+                    self.logger.info(f"Slowing {self.name} from {old_rate:.2f} to {self.rate:.2f} req/s ({reason})")
+            else:
+                self.rate = min(self.max_rps, self.rate + self.increase)
+
+            # Track typical latency from healthy responses only
+            if not throttled:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+
+class RateLimiter:
+    """Per-domain token buckets shared by every fetch path"""
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url, config):
+        """Get the bucket for a URL's domain, creating it from the site's rate_limit settings"""
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            if domain not in self._buckets:
+                settings = dict(config.get('rate_limit') or {})
+                # Sites without a rate_limit block keep roughly their old per-request delay
+                settings.setdefault('requests_per_second', 1.0 / max(config.get('delay', 2.0), 0.1))
+                self._buckets[domain] = TokenBucket(name=domain, **settings)
+            return self._buckets[domain]
+
+    def rates(self):
+        """Current request rate per domain"""
+        with self._lock:
+            return {domain: bucket.rate for domain, bucket in self._buckets.items()}
@@ -0,0 +1,141 @@
+import os
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ('utm_', 'gclid', 'fbclid', 'mc_cid', 'mc_eid')
+
+def normalize_url(url):
+    """Normalize a URL into a cache key"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, netloc, parts.path or '/', urlencode(query), ''))
+
+class CacheEntry:
+    """A cached response body with its validators"""
+    def __init__(self, url, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl):
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self):
+        """Headers for a conditional request revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    def __init__(self, path="data/cache/responses.sqlite", max_bytes=500 * 1024 * 1024, logger=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger('response_cache')
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                site TEXT,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        # Per-site counters: hit (fresh), revalidated (304), miss (downloaded)
+        self.stats = defaultdict(lambda: {'hit': 0, 'revalidated': 0, 'miss': 0})
+
+    def get(self, url):
+        """Look up a cached response, fresh or stale"""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), key))
+            self._conn.commit()
+        body, etag, last_modified, fetched_at = row
+        return CacheEntry(key, zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at)
+
+    def put(self, url, body, site=None, etag=None, last_modified=None):
+        """Store a response body, evicting least recently used entries over the size limit"""
+        key = normalize_url(url)
+        data = zlib.compress(body.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE url = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, site, body, etag, last_modified, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, site, data, etag, last_modified, now, now, len(data))
+            )
+            self._total_bytes += len(data) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """Mark a cached response as revalidated (HTTP 304)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, normalize_url(url))
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its limit"""
+        target = self.max_bytes * 0.9
+        evicted = 0
+        rows = self._conn.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self._total_bytes -= size
+            evicted += 1
+        self.logger.info(f"Evicted {evicted} cached responses")
+
+    def record(self, site, outcome):
+        """Count a cache hit, revalidation or miss for a site"""
+        with self._lock:
+            self.stats[site][outcome] += 1
+
+    def summary(self, site):
+        stats = self.stats[site]
+        return f"{stats['hit']} hits, {stats['revalidated']} revalidated, {stats['miss']} misses"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,49 +1,246 @@
 from abc import ABC, abstractmethod
-from src.selenium_scraper import SeleniumScraper
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.driver_pool import DriverPool
+from src.http_fetcher import HttpFetcher
+from src.selenium_scraper import SeleniumScraper, estimate_bytes_saved
+from src.parse_pool import completed, parse_search_html, parse_detail_html
+from src.listing import Listing
 from src.parser import Parser
-from src.utils import setup_logger, random_delay, retry
-import time
+from src.selector_plan import SelectorPlan
+from src.rate_limiter import RateLimiter
+from src.structured_data import StructuredData, complete_detail
+from src.utils import setup_logger, host_slot
+import threading
 
 class BaseScraper(ABC):
-    def __init__(self, site_name, config):
+    # Scrapers that page through results by clicking next-page links need the first page open in the browser
+    paginates_in_browser = False
+
+    def __init__(self, site_name, config, driver_pool=None, http_fetcher=None, response_cache=None,
+                 listing_index=None, rate_limiter=None, parse_pool=None, on_listings=None):
         self.site_name = site_name
         self.config = config
         self.logger = setup_logger(site_name, f'logs/{site_name}.log')
-        self.selenium_scraper = SeleniumScraper(headless=True, timeout=config.get('timeout', 30))
+        self.detail_workers = max(1, config.get('detail_workers', 1))
+        self.host_concurrency = config.get('host_concurrency', self.detail_workers)
+
+        # One browser for search pages plus one per detail worker
+        self._owns_pool = driver_pool is None
+        self.driver_pool = driver_pool or DriverPool(max_browsers=1 + self.detail_workers)
+        self.selenium_scraper = self._new_browser()
+
+        # Plain HTTP tier tried before the browser, per page type (see fetch_mode in sites.json)
+        self._owns_http = http_fetcher is None
+        self.http_fetcher = http_fetcher or HttpFetcher(
+            timeout=config.get('timeout', 30),
+            pool_size=1 + self.detail_workers,
+            logger=self.logger
+        )
         self.parser = Parser()
+        # Selectors compiled once per site (ConfigLoader has already validated them)
+        self.selector_plan = SelectorPlan.for_config(config)
+        # JSON-LD / embedded state read before any detail page (see structured_data in sites.json)
+        self.structured_data = StructuredData.for_config(config)
+        self.structured_skips = 0
+        
+        # Finished listings go to on_listings(site_name, listings) page by page as they complete;
+        # without a callback they are kept in self.listings
+        self.on_listings = on_listings
         self.listings = []
+        self.scraped_count = 0
+        # Search pages that could not be fetched, parsed or paginated to; a site with any is
+        # incomplete, so listings missing from this run must not be taken as delisted
+        self.failed_pages = 0
+        # Set by scrape() once pagination runs out of next-page links; stopping at a page
+        # limit (or never paginating) leaves it False, since listings may continue past it
+        self.reached_last_page = False
+
+        # Optional shared worker processes for parsing; without one pages are parsed inline
+        self.parse_pool = parse_pool
+        self._pending_pages = []
+
+        # Per-domain adaptive rate limit shared by every fetch path (see rate_limit in sites.json)
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        # Optional on-disk cache of detail pages, shared by both fetch tiers
+        self.response_cache = response_cache
+        self.cache_ttl = config.get('cache_ttl', 86400)
+
+        # Optional seen-listing index for incremental crawls
+        self.listing_index = listing_index
+        self.detail_refresh_days = config.get('detail_refresh_days', 7)
+
+        # Detail pages are fetched by a bounded worker pool, each worker with its own browser
+        self._detail_executor = None
+        self._detail_local = threading.local()
+        self._detail_browsers = []
+        self._detail_lock = threading.Lock()
     
     @abstractmethod
     def scrape(self):
         """Main scraping method to be implemented by each site scraper"""
         pass
     
+    def crawled_every_page(self):
+        """Whether this run saw every search result, so listings it missed are really gone"""
+        return self.reached_last_page and not self.failed_pages
+    
     def fetch_search_page(self, page_url):
         """Fetch a search results page with enhanced error handling"""
         try:
             list_container_selector = self.config['selectors'].get('list_container')
-            html = self.selenium_scraper.fetch_page(page_url, list_container_selector)
+            html = self.fetch_page(page_url, 'search', self.selenium_scraper, list_container_selector)
             
             # Verify we got meaningful content
             if html and len(html) > 1000:  # Basic check for meaningful content
                 return html
             else:
                 self.logger.warning(f"Page content seems empty or too short: {page_url}")
+                self.failed_pages += 1
                 return None
                 
         except Exception as e:
             self.logger.error(f"Error fetching search page {page_url}: {e}")
+            self.failed_pages += 1
             return None
     
+    def get_fetch_mode(self, page_type):
+        """Get the fetch mode ("http", "browser" or "auto") for a page type"""
+        fetch_mode = self.config.get('fetch_mode', 'browser')
+        if isinstance(fetch_mode, dict):
+            fetch_mode = fetch_mode.get(page_type, 'browser')
+        if page_type == 'search' and self.paginates_in_browser and fetch_mode != 'browser':
+            self.logger.warning(f"{self.site_name} paginates in the browser, so search pages are fetched there "
+                                f"instead of with fetch_mode {fetch_mode!r}")
+            return 'browser'
+        return fetch_mode
+    
+    def get_readiness(self, page_type):
+        """Get the browser readiness strategy for a page type"""
+        readiness = dict(self.config.get('readiness', {}).get(page_type) or {})
+        if page_type == 'detail' and readiness.get('strategy', 'selector') == 'selector' and not readiness.get('selector'):
+            # A detail page is usable once any of its fields has rendered
+            readiness['selector'] = self.selector_plan.detail_css()
+        return readiness
+    
+    def fetch_page(self, url, page_type, browser, wait_for_element=None, cached=None):
+        """Fetch a page over HTTP first when allowed, falling back to the browser"""
+        # Detail pages are cached; a stale entry is revalidated on the HTTP tier
+        use_cache = self.response_cache is not None and page_type == 'detail'
+        fetch_mode = self.get_fetch_mode(page_type)
+        bucket = self.rate_limiter.bucket(url, self.config)
+        if fetch_mode in ('http', 'auto'):
+            try:
+                response = self.http_fetcher.get(url, headers=cached.validators() if cached else None, bucket=bucket)
+                if response.status_code == 304 and cached:
+                    self.response_cache.touch(url)
+                    self.response_cache.record(self.site_name, 'revalidated')
+                    return cached.body
+                
+                html = response.text
+                # In auto mode only trust the response if the site selectors match it, or if
+                # its structured data already has every detail field; both checks share one tree
+                document = self.selector_plan.document(html) if fetch_mode == 'auto' else None
+                if fetch_mode == 'http' or self.parser.selectors_match(document, self.selector_plan, page_type) \
+                        or (page_type == 'detail' and self._structured_complete(document)):
+                    if use_cache:
+                        self.response_cache.put(url, html, self.site_name,
+                                                etag=response.headers.get('ETag'),
+                                                last_modified=response.headers.get('Last-Modified'))
+                        self.response_cache.record(self.site_name, 'miss')
+                    return html
+                self.logger.info(f"Selectors not found in HTTP response, using browser: {url}")
+            except Exception as e:
+                if fetch_mode == 'http':
+                    raise
+                self.logger.info(f"HTTP fetch failed, using browser: {url} ({e})")
+        
+        html = browser.fetch_page(
+            url, wait_for_element,
+            bucket=bucket,
+            readiness=self.get_readiness(page_type),
+            resource_policy=self.config.get('resource_policy')
+        )
+        if use_cache and html:
+            self.response_cache.put(url, html, self.site_name)
+            self.response_cache.record(self.site_name, 'miss')
+        return html
+    
     def parse_search_page(self, html):
-        """Parse search results page and extract listing cards"""
+        """Parse search results page into listing cards, parsing the page only once"""
         try:
-            cards = self.parser.extract_listing_cards(html, self.config['selectors'])
+            if self.parse_pool is not None:
+                return self.parse_pool.parse_search_page(html, self.config).result()
+            cards = parse_search_html(html, self.config)
             return cards
         except Exception as e:
             self.logger.error(f"Error parsing search page: {e}")
+            self.failed_pages += 1
             return []
     
+    def queue_search_page(self, html, page_num=1):
+        """Parse a search page and process its cards in the background, so the next page can be fetched meanwhile"""
+        # Hand on earlier pages that have finished, so listings leave memory while the crawl goes on
+        self._emit_finished_pages()
+        if self.parse_pool is not None:
+            parsed = self.parse_pool.parse_search_page(html, self.config)
+        else:
+            parsed = completed(parse_search_html, html, self.config)
+        page = Future()
+        self._pending_pages.append(page)
+        parsed.add_done_callback(lambda parsed: self._start_listing_cards(parsed, page, page_num))
+    
+    def _start_listing_cards(self, parsed, page, page_num):
+        """Hand a parsed page's cards to the detail workers (called when its parse finishes)"""
+        try:
+            cards = parsed.result()
+        except Exception as e:
+            self.logger.error(f"Error parsing search page {page_num}: {e}")
+            with self._detail_lock:
+                self.failed_pages += 1
+            cards = []
+        self.logger.info(f"Found {len(cards)} listing cards on page {page_num}")
+        try:
+            page.set_result(self.submit_listing_cards(cards, page_num))
+        except Exception as e:
+            page.set_exception(e)
+    
+    def collect_listings(self):
+        """Wait for every queued search page and emit its listings, in page and card order"""
+        self._emit_finished_pages(wait=True)
+    
+    def emit(self, listings):
+        """Pass finished listings to on_listings, or keep them in self.listings"""
+        if not listings:
+            return
+        self.scraped_count += len(listings)
+        if self.on_listings is not None:
+            self.on_listings(self.site_name, listings)
+        else:
+            self.listings.extend(listings)
+    
+    def _emit_finished_pages(self, wait=False):
+        """Emit queued pages from the front of the queue while they are finished (or all of them, waiting)"""
+        while self._pending_pages:
+            page = self._pending_pages[0]
+            if not wait and not self._page_finished(page):
+                break
+            self._pending_pages.pop(0)
+            try:
+                futures = page.result()
+            except Exception as e:
+                self.logger.error(f"Error processing search page: {e}")
+                self.failed_pages += 1
+                continue
+            self.emit([listing for listing in (future.result() for future in futures) if listing])
+    
+    @staticmethod
+    def _page_finished(page):
+        if not page.done():
+            return False
+        return page.exception() is not None or all(future.done() for future in page.result())
+    
     def fetch_listing_detail(self, listing_url):
         """Fetch detailed listing page"""
         try:
@@ -54,7 +251,15 @@ class BaseScraper(ABC):
             else:
                 full_url = listing_url
             
-            html = self.selenium_scraper.fetch_page(full_url)
+            # Serve unexpired pages from the response cache without touching the network
+            cached = self.response_cache.get(full_url) if self.response_cache else None
+            if cached and cached.is_fresh(self.cache_ttl):
+                self.response_cache.record(self.site_name, 'hit')
+                return cached.body
+            
+            # Bound concurrent requests per host across all scrapers; pacing is left to the rate limiter
+            with host_slot(full_url, self.host_concurrency):
+                html = self.fetch_page(full_url, 'detail', self._detail_browser(), cached=cached)
             return html
         except Exception as e:
             self.logger.error(f"Error fetching listing detail {listing_url}: {e}")
@@ -63,34 +268,56 @@ class BaseScraper(ABC):
     def parse_listing_detail(self, html):
         """Parse detailed listing information"""
         try:
-            detail_info = self.parser.parse_listing_detail(html, self.config['selectors'])
+            # With a parse pool this worker's browser is free again while the page parses elsewhere
+            if self.parse_pool is not None:
+                return self.parse_pool.parse_listing_detail(html, self.config).result()
+            detail_info = parse_detail_html(html, self.config)
             return detail_info
         except Exception as e:
             self.logger.error(f"Error parsing listing detail: {e}")
             return {'details': {}, 'agent': {}}
     
-    def process_listing_card(self, card_html):
+    def process_listing_card(self, card):
         """Process a single listing card with enhanced error handling"""
         try:
-            # Parse basic info from card
-            listing = self.parser.parse_listing_card(card_html, self.config['selectors'])
+            # Cards from parse_search_page are already parsed; HTML or nodes are parsed here
+            if isinstance(card, Listing):
+                listing = card.copy()
+            elif isinstance(card, dict):
+                listing = Listing.from_dict(card)
+            else:
+                listing = self.parser.parse_listing_card(card, self.selector_plan)
             
             if not listing:
                 self.logger.warning("Failed to parse basic listing info from card")
                 return None
             
-            # Fetch detail page if URL is available
-            if 'url' in listing and listing['url']:
-                detail_html = self.fetch_listing_detail(listing['url'])
-                if detail_html:
-                    detail_info = self.parse_listing_detail(detail_html)
-                    listing.update(detail_info)
+            # Detail fields the search page's structured data already provided
+            found, listing.structured = listing.structured or {}, None
+            
+            # Fetch detail page if URL is available, unless the card is unchanged since the last run
+            if listing.url and not self._reuse_detail(listing):
+                if self.structured_data.enabled and not self.structured_data.missing_fields(found, self.selector_plan):
+                    # Nothing is left that the detail page could add
+                    detail_info = complete_detail(found)
+                    with self._detail_lock:
+                        self.structured_skips += 1
+                else:
+                    detail_html = self.fetch_listing_detail(listing.url)
+                    detail_info = complete_detail(found, self.parse_listing_detail(detail_html)) if detail_html else None
+                
+                if detail_info:
+                    listing.set_detail(detail_info)
+                    if self.listing_index is not None:
+                        self.listing_index.record(listing, self.site_name, detail_info)
                 else:
-                    self.logger.warning(f"Failed to fetch detail page for {listing.get('url', 'unknown')}")
+                    self.logger.warning(f"Failed to fetch detail page for {listing.url}")
+                    if self.listing_index is not None:
+                        self.listing_index.record(listing, self.site_name)
             
             # Add timestamp
             from datetime import datetime
-            listing['scraped_at'] = datetime.now().isoformat()
+            listing.scraped_at = datetime.now().isoformat()
             
             return listing
             
@@ -98,6 +325,84 @@ class BaseScraper(ABC):
             self.logger.error(f"Error processing listing card: {e}")
             return None
     
+    def _structured_complete(self, page):
+        """Whether a page's structured data has every detail field, so it needs no browser render"""
+        if not self.structured_data.enabled:
+            return False
+        found = self.structured_data.detail_page(page, self.selector_plan)
+        return not self.structured_data.missing_fields(found, self.selector_plan)
+    
+    def _reuse_detail(self, listing):
+        """Carry forward detail data from the listing index when the card has not changed"""
+        if self.listing_index is None:
+            return False
+        return self.listing_index.reuse_detail(listing, self.site_name, self.detail_refresh_days * 86400)
+    
+    def submit_listing_cards(self, cards, page_num=1):
+        """Queue a page of listing cards on the detail workers; returns one future per card"""
+        if not cards:
+            return []
+
+        with self._detail_lock:
+            if self._detail_executor is None:
+                self._detail_executor = ThreadPoolExecutor(
+                    max_workers=self.detail_workers,
+                    thread_name_prefix=f"{self.site_name}-detail"
+                )
+
+        def process(i, card):
+            self.logger.info(f"Processing listing {i+1}/{len(cards)} on page {page_num}")
+            return self.process_listing_card(card)
+
+        return [self._detail_executor.submit(process, i, card) for i, card in enumerate(cards)]
+
+    def _new_browser(self, keep_lease=True):
+        return SeleniumScraper(
+            headless=True,
+            timeout=self.config.get('timeout', 30),
+            driver_pool=self.driver_pool,
+            logger=self.logger,
+            keep_lease=keep_lease
+        )
+
+    def _detail_browser(self):
+        """Get the browser owned by the current detail worker thread"""
+        browser = getattr(self._detail_local, 'browser', None)
+        if browser is None:
+            # Detail pages need no browser state, so the driver goes back to the pool after each one
+            browser = self._new_browser(keep_lease=False)
+            self._detail_local.browser = browser
+            with self._detail_lock:
+                self._detail_browsers.append(browser)
+        return browser
+
+    def throttle(self, url):
+        """Wait for the rate limiter before a page load not made through fetch_page, e.g. a pagination click"""
+        self.rate_limiter.bucket(url, self.config).acquire()
+    
+    def _log_browser_stats(self, browsers):
+        """Log page readiness and network transfer totals for this site's browsers"""
+        ready_times = sorted(t for browser in browsers for t in browser.ready_times)
+        if not ready_times:
+            return
+        self.logger.info(
+            f"Browser pages for {self.site_name}: {len(ready_times)}, "
+            f"median time to ready {ready_times[len(ready_times) // 2]:.2f}s, "
+            f"slowest {ready_times[-1]:.2f}s"
+        )
+        
+        bytes_by_type, loaded_by_type, blocked_by_type = Counter(), Counter(), Counter()
+        for browser in browsers:
+            bytes_by_type.update(browser.bytes_by_type)
+            loaded_by_type.update(browser.loaded_by_type)
+            blocked_by_type.update(browser.blocked_by_type)
+        saved = estimate_bytes_saved(bytes_by_type, loaded_by_type, blocked_by_type)
+        blocked = ', '.join(f"{count} {resource_type}" for resource_type, count in blocked_by_type.most_common())
+        self.logger.info(
+            f"Browser transfer for {self.site_name}: {sum(bytes_by_type.values()) / 1048576:.1f} MB received, "
+            f"blocked {blocked or 'nothing'} (~{saved / 1048576:.1f} MB saved)"
+        )
+    
     def navigate_pagination(self):
         """Handle pagination - to be implemented by subclasses if needed"""
         # This is a basic implementation that can be overridden
@@ -105,7 +410,33 @@ class BaseScraper(ABC):
     
     def close(self):
         """Clean up resources"""
+        if getattr(self, '_closed', False):
+            return
+        self._closed = True
+        # Let queued pages finish before their detail workers go away
+        if self._pending_pages:
+            self.collect_listings()
+        if self._detail_executor is not None:
+            self._detail_executor.shutdown(wait=True)
+            self._detail_executor = None
+        with self._detail_lock:
+            browsers, self._detail_browsers = self._detail_browsers, []
+        self._log_browser_stats(browsers + [self.selenium_scraper])
+        for browser in browsers:
+            browser.close()
         self.selenium_scraper.close()
+        if self.response_cache is not None:
+            self.logger.info(f"Response cache for {self.site_name}: {self.response_cache.summary(self.site_name)}")
+        if self.listing_index is not None:
+            self.logger.info(f"Listing index for {self.site_name}: {self.listing_index.summary(self.site_name)}")
+        if self.structured_data.enabled:
+            self.logger.info(f"Structured data for {self.site_name}: {self.structured_skips} listings needed no detail page")
+        if self._owns_http:
+            self.http_fetcher.close()
+            self._owns_http = False
+        if self._owns_pool:
+            self.driver_pool.close()
+            self._owns_pool = False
     
     def __del__(self):
         self.close()
\ No newline at end of file
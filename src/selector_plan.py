@@ -0,0 +1,214 @@
+import re
+import json
+import threading
+import soupsieve
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+from cssselect import HTMLTranslator
+from src.utils import clean_text
+
+# "img.photo::attr(src)" style selectors read an attribute instead of text
+ATTR_PATTERN = re.compile(r'^(?P<css>.*?)::attr\((?P<attr>[\w:-]+)\)\s*$')
+
+# Lazy-loading pages keep the real image URL in a data attribute
+ATTR_FALLBACKS = {
+    'src': ('src', 'data-src', 'data-original')
+}
+
+# Selector key -> (output field, normalizer, attributes read instead of text).
+# Prices and numbers are kept as text here and typed in one batch by src/normalizer.py
+CARD_SPECS = {
+    'product_title': ('title', clean_text, None),
+    'price': ('price', clean_text, None),
+    'location': ('location', clean_text, None),
+    'product_link': ('url', None, ('href',)),
+    'image_url': ('image_url', None, ATTR_FALLBACKS['src'])
+}
+DETAIL_SPECS = {
+    'beds': ('beds', clean_text, None),
+    'baths': ('baths', clean_text, None),
+    'sqft': ('sqft', clean_text, None),
+    'acres': ('acres', clean_text, None),
+    'parking': ('parking', clean_text, None),
+    'garage': ('garage', clean_text, None),
+    'property_type': ('property_type', clean_text, None)
+}
+AGENT_SPECS = {
+    'agent_name': ('name', clean_text, None),
+    'agent_license': ('license', clean_text, None),
+    'agent_office': ('office', clean_text, None),
+    'agent_phone': ('phone', clean_text, None)
+}
+
+# bs4 leaves the contents of these tags out of get_text()
+NON_TEXT_TAGS = ('script', 'style', 'template')
+
+class SoupSelector:
+    """A CSS selector compiled with soupsieve, run against BeautifulSoup trees"""
+    def __init__(self, css):
+        self.css = css
+        self.pattern = soupsieve.compile(css)
+
+    @staticmethod
+    def document(html):
+        return BeautifulSoup(html, 'lxml')
+
+    @staticmethod
+    def text(element):
+        return element.get_text(strip=True)
+
+    def select_one(self, node):
+        """Select the first match under a node, counting a card node itself as a re-parsed card would"""
+        if isinstance(node, Tag) and not isinstance(node, BeautifulSoup) and self.pattern.match(node):
+            return node
+        return self.pattern.select_one(node)
+
+    def select(self, node):
+        return self.pattern.select(node)
+
+class XPathSelector:
+    """A CSS selector translated to XPath once, run against lxml.html trees"""
+    translator = HTMLTranslator()
+
+    def __init__(self, css):
+        self.css = css
+        # descendant-or-self:: already counts a card node itself, like SoupSelector.select_one
+        xpath = self.translator.css_to_xpath(css)
+        self.all = etree.XPath(xpath)
+        self.first = etree.XPath(f"({xpath})[1]")
+
+    @staticmethod
+    def document(html):
+        if not html or not html.strip():
+            html = '<html></html>'
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be parsed as bytes
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+        except etree.ParserError:
+            return lxml.html.document_fromstring('<html></html>')
+
+    @staticmethod
+    def text(element):
+        """Same result as bs4's get_text(strip=True): stripped text nodes joined, skipping comments and scripts"""
+        return ''.join(part.strip() for part in XPathSelector._texts(element) if part.strip())
+
+    @staticmethod
+    def _texts(element):
+        """Text nodes in document order"""
+        if isinstance(element.tag, str) and element.tag not in NON_TEXT_TAGS and element.text:
+            yield element.text
+        for child in element:
+            yield from XPathSelector._texts(child)
+            if child.tail:
+                yield child.tail
+
+    def select_one(self, node):
+        matches = self.first(node)
+        return matches[0] if matches else None
+
+    def select(self, node):
+        return self.all(node)
+
+# Values for the "parser" key in sites.json
+BACKENDS = {
+    'bs4': SoupSelector,
+    'lxml': XPathSelector
+}
+
+class FieldRule:
+    """One compiled selector with the attribute it reads and the normalizer it applies"""
+    def __init__(self, key, selector, field, normalizer=None, attrs=None, backend=SoupSelector):
+        self.key = key
+        self.field = field
+        self.normalizer = normalizer
+
+        match = ATTR_PATTERN.match(selector)
+        if match:
+            css = match.group('css').strip()
+            attr = match.group('attr')
+            self.attrs = ATTR_FALLBACKS.get(attr, (attr,))
+        else:
+            css = selector
+            self.attrs = attrs
+        self.css = css
+        self.selector = backend(css)
+
+    def select_one(self, node):
+        return self.selector.select_one(node)
+
+    def extract(self, node):
+        """Extract the raw text or attribute value, or "" when missing"""
+        element = self.selector.select_one(node)
+        if element is None:
+            return ""
+        if self.attrs:
+            for attr in self.attrs:
+                value = element.get(attr)
+                if value:
+                    return value
+            return ""
+        return self.selector.text(element)
+
+    def value(self, node):
+        """Extract and normalize the field"""
+        raw = self.extract(node)
+        return self.normalizer(raw) if self.normalizer else raw
+
+class SelectorPlan:
+    """A site's selectors compiled once into field rules"""
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, selectors, backend='bs4'):
+        if backend not in BACKENDS:
+            raise Exception(f"Unknown parser backend: {backend}")
+        self.selectors = selectors
+        self.backend = backend
+        self.selector_class = BACKENDS[backend]
+        self.base_url = selectors.get('base_url', '')
+        self.list_container = self._compile(selectors.get('list_container'))
+        self.product_card = self._compile(selectors.get('product_card'))
+        self.card_rules = self._rules(selectors, CARD_SPECS)
+        self.detail_rules = self._rules(selectors, DETAIL_SPECS)
+        self.agent_rules = self._rules(selectors, AGENT_SPECS)
+
+    def _compile(self, css):
+        return self.selector_class(css) if css else None
+
+    def _rules(self, selectors, specs):
+        rules = {}
+        for key, (field, normalizer, attrs) in specs.items():
+            if selectors.get(key):
+                rules[key] = FieldRule(key, selectors[key], field, normalizer, attrs, self.selector_class)
+        return rules
+
+    @classmethod
+    def for_selectors(cls, selectors, backend='bs4'):
+        """Get the compiled plan for a selectors dict, compiling it only the first time"""
+        if isinstance(selectors, SelectorPlan):
+            return selectors
+        key = (backend, json.dumps(selectors, sort_keys=True))
+        with cls._cache_lock:
+            plan = cls._cache.get(key)
+            if plan is None:
+                plan = cls._cache[key] = cls(selectors, backend)
+            return plan
+
+    @classmethod
+    def for_config(cls, config):
+        """Get the compiled plan for a site config, using the backend named by its "parser" key"""
+        return cls.for_selectors(config.get('selectors', {}), config.get('parser', 'bs4'))
+
+    def document(self, html):
+        """Parse HTML into a tree this plan's selectors run against; a tree parsed already is returned as is"""
+        if html is not None and not isinstance(html, str):
+            return html
+        return self.selector_class.document(html)
+
+    def detail_css(self):
+        """A selector list matching any detail field, used to tell a rendered detail page"""
+        return ', '.join(rule.css for rule in list(self.detail_rules.values()) + list(self.agent_rules.values()))
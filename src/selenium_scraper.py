@@ -1,93 +1,212 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-from src.utils import get_random_user_agent, random_delay, retry
+from src.driver_pool import DriverPool
+from src.utils import random_delay, retry
+from collections import Counter
+import json
+import logging
 import time
 
+# URL patterns for Network.setBlockedURLs, by resource type
+RESOURCE_PATTERNS = {
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*', '*.bmp*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*', '*.ogg*', '*.mov*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'stylesheet': ['*.css*']
+}
+
+# Rough transfer sizes, used to estimate savings for blocked types never seen loading in a run
+TYPICAL_RESOURCE_BYTES = {
+    'Image': 100 * 1024,
+    'Media': 1024 * 1024,
+    'Font': 40 * 1024,
+    'Stylesheet': 30 * 1024,
+    'Script': 50 * 1024
+}
+
+def estimate_bytes_saved(bytes_by_type, loaded_by_type, blocked_by_type):
+    """Estimate bytes not downloaded, from the average size of each blocked resource type"""
+    saved = 0
+    for resource_type, blocked in blocked_by_type.items():
+        if loaded_by_type.get(resource_type):
+            average = bytes_by_type[resource_type] / loaded_by_type[resource_type]
+        else:
+            average = TYPICAL_RESOURCE_BYTES.get(resource_type, 0)
+        saved += blocked * average
+    return saved
+
+def blocked_url_patterns(resource_policy):
+    """Build the blocked URL patterns for a site's resource_policy"""
+    if not resource_policy:
+        return []
+    patterns = []
+    for resource_type in resource_policy.get('block', []):
+        patterns.extend(RESOURCE_PATTERNS.get(resource_type, []))
+    for domain in resource_policy.get('blocked_domains', []):
+        patterns.extend([f"*://{domain}/*", f"*.{domain}/*"])
+    return patterns
+
 class SeleniumScraper:
-    def __init__(self, headless=True, timeout=30):
+    def __init__(self, headless=True, timeout=30, driver_pool=None, logger=None, keep_lease=True):
         self.headless = headless
         self.timeout = timeout
+        # Search browsers keep their driver for pagination; detail browsers return it after every page
+        self.keep_lease = keep_lease
+        self.logger = logger or logging.getLogger('selenium_scraper')
+        # Without a shared pool, keep a private single-browser pool
+        self._owns_pool = driver_pool is None
+        self.driver_pool = driver_pool or DriverPool(max_browsers=1, headless=headless)
+        self.lease = None
         self.driver = None
+        # Seconds from navigation to readiness for every page loaded
+        self.ready_times = []
+        # Network accounting from CDP events, by resource type
+        self.bytes_by_type = Counter()
+        self.loaded_by_type = Counter()
+        self.blocked_by_type = Counter()
+        self._request_types = {}
         
     def setup_driver(self):
-        """Set up Chrome WebDriver with options"""
-        chrome_options = Options()
-        if self.fetch_pageheadless:
-            chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option("useAutomationExtension", False)
-        
+        """Lease a Chrome WebDriver from the driver pool"""
         try:
-            driver_path = ChromeDriverManager().install()
-            driver_path = str(Path(driver_path).with_name("chromedriver.exe"))
-            self.logger.info(f"Using ChromeDriver executable: {driver_path}")
-
-            service = Service(driver_path)
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            return driver
+            self.lease = self.driver_pool.lease()
+            self.driver = self.lease.driver
+            return self.driver
         except Exception as e:
-            print(f"Failed to setup driver: {e}")
-            return False
+            self.logger.error(f"Failed to setup driver: {e}")
+            return None
 
-    
     @retry(max_attempts=3, delay=2.0)
-    def fetch_page(self, url, wait_for_element=None):
-        """Fetch a page with Selenium and return the page source with enhanced stability"""
+    def fetch_page(self, url, wait_for_element=None, bucket=None, readiness=None, resource_policy=None):
+        """Fetch a page with Selenium and return the page source as soon as it is ready"""
+        if self.lease is not None:
+            # A driver held across pages gets the pool's health check before every new load
+            reason = self.driver_pool.recycle_reason(self.lease)
+            if reason:
+                self.release(reason)
         if not self.driver:
             if not self.setup_driver():
                 raise Exception("Failed to initialize WebDriver")
         
         try:
+            # Wait for the domain's rate limiter instead of a fixed sleep
+            if bucket is not None:
+                bucket.acquire()
+            # Account for network events left over from the previous page
+            self._network_events()
+            self._apply_resource_policy(resource_policy)
+            started = time.time()
             self.driver.get(url)
-            random_delay(1.0, 2.0)
+            self.lease.pages_loaded += 1
             
-            # Wait for specific element if provided
-            if wait_for_element:
-                try:
-                    WebDriverWait(self.driver, self.timeout).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_element))
-                    )
-                except TimeoutException:
-                    self.logger.warning(f"Timeout waiting for element {wait_for_element} on {url}")
-                    # Continue anyway, we might still get some content
+            if not self.wait_until_ready(readiness or {}, wait_for_element):
+                self.logger.warning(f"Timeout waiting for {url} to become ready")
+                # Continue anyway, we might still get some content
             
-            # Wait for page to load completely with multiple checks
-            try:
-                WebDriverWait(self.driver, self.timeout).until(
-                    lambda driver: driver.execute_script('return document.readyState') == 'complete'
-                )
-            except TimeoutException:
-                self.logger.warning(f"Page {url} took too long to load completely")
+            time_to_ready = time.time() - started
+            self.ready_times.append(time_to_ready)
+            self.logger.debug(f"Page ready in {time_to_ready:.2f}s: {url}")
             
-            # Additional check for content presence
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    lambda driver: len(driver.page_source) > 1000
-                )
-            except TimeoutException:
-                self.logger.warning(f"Page {url} has very little content")
-            
-            return self.driver.page_source
+            # The browser does not expose status codes, so adapt on load time only
+            if bucket is not None:
+                bucket.record(time_to_ready)
+            html = self.driver.page_source
+            if not self.keep_lease:
+                self._network_events()
+                self.release()
+            return html
             
         except Exception as e:
             self.logger.error(f"Error fetching page {url}: {e}")
-            # Try to recover driver
-            try:
-                self.driver.quit()
-            except:
-                pass
+            # Drop the broken driver; the retry will lease a fresh one
+            self.driver_pool.discard(self.lease)
+            self.lease = None
             self.driver = None
             raise
     
+    def wait_until_ready(self, readiness, wait_for_element=None):
+        """Wait for a page by the configured strategy: selector, network_idle or js"""
+        strategy = readiness.get('strategy', 'selector')
+        wait = WebDriverWait(self.driver, readiness.get('timeout', self.timeout), poll_frequency=0.1)
+        try:
+            if strategy == 'network_idle':
+                wait.until(self._network_idle(readiness.get('idle_ms', 500) / 1000))
+            elif strategy == 'js':
+                # The script is a predicate, e.g. "return window.__APP_READY__ === true"
+                wait.until(lambda driver: driver.execute_script(readiness['script']))
+            else:
+                selector = readiness.get('selector') or wait_for_element
+                if selector:
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                else:
+                    wait.until(lambda driver: driver.execute_script('return document.readyState') != 'loading')
+            return True
+        except TimeoutException:
+            return False
+    
+    def _network_idle(self, idle_seconds):
+        """Build a wait condition that holds once no request has been in flight for idle_seconds"""
+        inflight = set()
+        state = {'idle_since': None}
+        
+        def condition(driver):
+            for method, params in self._network_events():
+                if method == 'Network.requestWillBeSent':
+                    inflight.add(params.get('requestId'))
+                elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                    inflight.discard(params.get('requestId'))
+            if inflight:
+                state['idle_since'] = None
+                return False
+            if state['idle_since'] is None:
+                state['idle_since'] = time.time()
+            return time.time() - state['idle_since'] >= idle_seconds
+        return condition
+    
+    def _apply_resource_policy(self, resource_policy):
+        """Block heavy or third-party resources for this site through CDP"""
+        patterns = blocked_url_patterns(resource_policy)
+        # Drivers are shared between sites, so only reapply when the policy changes
+        if self.lease.blocked_patterns == patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+            self.lease.blocked_patterns = patterns
+        except Exception as e:
+            self.logger.warning(f"Could not apply resource policy: {e}")
+    
+    def _network_events(self):
+        """Read and clear the CDP Network events buffered in the performance log"""
+        events = []
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return events
+        for entry in entries:
+            message = json.loads(entry['message']).get('message', {})
+            method = message.get('method', '')
+            if not method.startswith('Network.'):
+                continue
+            params = message.get('params', {})
+            events.append((method, params))
+            
+            # Keep per-run transfer accounting
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                self._request_types[request_id] = params.get('type', 'Other')
+            elif method == 'Network.loadingFinished':
+                resource_type = self._request_types.pop(request_id, 'Other')
+                self.bytes_by_type[resource_type] += params.get('encodedDataLength', 0)
+                self.loaded_by_type[resource_type] += 1
+            elif method == 'Network.loadingFailed':
+                resource_type = self._request_types.pop(request_id, params.get('type', 'Other'))
+                if params.get('blockedReason'):
+                    self.blocked_by_type[resource_type] += 1
+        return events
+    
     def click_element(self, selector):
         """Click on an element using CSS selector"""
         try:
@@ -96,7 +215,7 @@ class SeleniumScraper:
             random_delay(1.0, 2.0)
             return True
         except Exception as e:
-            print(f"Error clicking element {selector}: {e}")
+            self.logger.warning(f"Error clicking element {selector}: {e}")
             return False
     
     def scroll_to_bottom(self):
@@ -105,10 +224,18 @@ class SeleniumScraper:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             random_delay(0.5, 1.0)
         except Exception as e:
-            print(f"Error scrolling to bottom: {e}")
+            self.logger.warning(f"Error scrolling to bottom: {e}")
     
+    def release(self, reason=None):
+        """Return the leased WebDriver to the pool, which recycles it when worn out"""
+        if self.lease:
+            self.driver_pool.release(self.lease, reason)
+            self.lease = None
+            self.driver = None
+
     def close(self):
-        """Close the WebDriver"""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
\ No newline at end of file
+        """Return the WebDriver to the pool"""
+        self.release()
+        if self._owns_pool:
+            self.driver_pool.close()
+            self._owns_pool = False
@@ -1,12 +1,13 @@
 from src.scraper import BaseScraper
-from src.utils import random_delay
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
 import time
 
 class OneKeyCommercialRentalsScraper(BaseScraper):
+    paginates_in_browser = True
+    
     def scrape(self):
         self.logger.info(f"Starting scraper: {self.site_name}")
         
@@ -22,21 +23,12 @@ class OneKeyCommercialRentalsScraper(BaseScraper):
                 self.logger.error("Failed to fetch initial search page")
                 return []
             
-            # Parse listings from first page
-            cards = self.parse_search_page(html)
-            self.logger.info(f"Found {len(cards)} listing cards on first page")
-            
-            # Process each listing
-            for i, card in enumerate(cards):
-                self.logger.info(f"Processing listing {i+1}/{len(cards)}")
-                listing = self.process_listing_card(str(card))
-                if listing:
-                    self.listings.append(listing)
-                random_delay(self.config.get('delay', 2.0) / 2, self.config.get('delay', 3.0))
+            # Parse and process the first page in the background while pagination continues
+            self.queue_search_page(html)
             
             # Handle pagination for OneKey Commercial Rentals
             page_num = 2
-            max_pages = 5  # Limit pages for demo purposes
+            max_pages = self.config.get('max_pages', 5)  # Limit pages for demo purposes
             
             while page_num <= max_pages:
                 try:
@@ -44,8 +36,9 @@ class OneKeyCommercialRentalsScraper(BaseScraper):
                         By.CSS_SELECTOR, f"a.page-link[data-page='{page_num}']"
                     )
                     
-                    if next_page_btn:
+                    if next_page_btn and next_page_btn.is_enabled():
                         self.logger.info(f"Navigating to page {page_num}")
+                        self.throttle(self.selenium_scraper.driver.current_url)
                         next_page_btn.click()
                         
                         # Wait for page to load
@@ -55,28 +48,35 @@ class OneKeyCommercialRentalsScraper(BaseScraper):
                         
                         # Get updated page source
                         html = self.selenium_scraper.driver.page_source
-                        cards = self.parse_search_page(html)
-                        self.logger.info(f"Found {len(cards)} listing cards on page {page_num}")
                         
-                        # Process each listing on this page
-                        for i, card in enumerate(cards):
-                            self.logger.info(f"Processing listing {i+1}/{len(cards)} on page {page_num}")
-                            listing = self.process_listing_card(str(card))
-                            if listing:
-                                self.listings.append(listing)
-                            random_delay(self.config.get('delay', 2.0) / 2, self.config.get('delay', 3.0))
+                        # Queue this page; the browser moves on to the next one while it is parsed
+                        self.queue_search_page(html, page_num)
                         
                         page_num += 1
                     else:
+                        # A disabled next button marks the last page
+                        self.reached_last_page = True
                         break
                         
+                except NoSuchElementException:
+                    # No link to the next page, so the last page has been reached
+                    self.reached_last_page = True
+                    break
                 except (TimeoutException, Exception) as e:
                     self.logger.warning(f"Pagination stopped at page {page_num}: {e}")
+                    self.failed_pages += 1
                     break
             
-            self.logger.info(f"Successfully scraped {len(self.listings)} listings from {self.site_name}")
+            if page_num > max_pages:
+                self.logger.info(f"Stopped at the {max_pages} page limit; results may continue past it")
+            
+            # Wait for queued pages to finish parsing and fetching details
+            self.collect_listings()
+            
+            self.logger.info(f"Successfully scraped {self.scraped_count} listings from {self.site_name}")
             return self.listings
             
         except Exception as e:
             self.logger.error(f"Error during scraping: {e}")
+            self.failed_pages += 1
             return []
\ No newline at end of file
@@ -0,0 +1,151 @@
+import re
+import json
+import threading
+from urllib.parse import urlparse
+from src.selector_plan import DETAIL_SPECS, AGENT_SPECS
+
+# Embedded app state is often assigned in a script, e.g. "window.__INITIAL_STATE__ = {...};"
+ASSIGNMENT_PATTERN = re.compile(r'^\s*(?:var\s+|let\s+|const\s+)?[\w$.]+\s*=\s*')
+PATH_PART_PATTERN = re.compile(r'([^.\[\]]+)|\[(\*|\d+)\]')
+
+def json_path(data, path):
+    """Values at a path like "floorSize.value" or "itemListElement[*].item"; [*] fans out over a list"""
+    values = [data]
+    for key, index in PATH_PART_PATTERN.findall(path or ''):
+        if key == '$':
+            continue
+        matches = []
+        for value in values:
+            if key and isinstance(value, dict) and key in value:
+                matches.append(value[key])
+            elif index == '*' and isinstance(value, list):
+                matches.extend(value)
+            elif index and index != '*' and isinstance(value, list) and int(index) < len(value):
+                matches.append(value[int(index)])
+        values = matches
+    return values
+
+def url_key(url):
+    """Compare listing URLs by path, so relative card links match absolute JSON URLs"""
+    return urlparse(url or '').path.rstrip('/')
+
+def complete_detail(found, parsed=None):
+    """Full details/agent dicts: structured values first, then the parsed detail page, then empty values"""
+    parsed = parsed or {}
+    detail_info = {}
+    for section, specs in (('details', DETAIL_SPECS), ('agent', AGENT_SPECS)):
+        values = {}
+        for field, normalizer, attrs in specs.values():
+            if field in found.get(section, {}):
+                values[field] = found[section][field]
+            elif field in parsed.get(section, {}):
+                values[field] = parsed[section][field]
+            else:
+                values[field] = normalizer("")
+        detail_info[section] = values
+    return detail_info
+
+class StructuredData:
+    """Reads listing fields from JSON-LD or embedded app state, as configured by "structured_data" in sites.json"""
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.enabled = bool(settings.get('fields'))
+        self.scripts = settings.get('scripts', "script[type='application/ld+json']")
+        # The scripts selector compiled for each parser backend, so it runs on the tree the plan built
+        self._script_selectors = {}
+        # Where listing objects sit in a search page's JSON, and where the listing sits on a detail page
+        self.listings_path = settings.get('listings')
+        self.listing_path = settings.get('listing', '')
+        self.url_path = settings.get('url', 'url')
+        self.fields = settings.get('fields', {})
+        # Selector keys that must be filled to skip the detail page (default: every detail selector)
+        self.required = settings.get('required')
+
+    @classmethod
+    def for_config(cls, config):
+        settings = config.get('structured_data') or {}
+        key = json.dumps(settings, sort_keys=True)
+        with cls._cache_lock:
+            extractor = cls._cache.get(key)
+            if extractor is None:
+                extractor = cls._cache[key] = cls(settings)
+            return extractor
+
+    def missing_fields(self, found, plan):
+        """Required selector keys the site can read from a detail page but structured data did not provide"""
+        missing = []
+        for key, rule in list(plan.detail_rules.items()) + list(plan.agent_rules.items()):
+            section = 'details' if key in DETAIL_SPECS else 'agent'
+            if (self.required is None or key in self.required) and rule.field not in found.get(section, {}):
+                missing.append(key)
+        return missing
+
+    def _script_selector(self, plan):
+        selector = self._script_selectors.get(plan.selector_class)
+        if selector is None:
+            selector = self._script_selectors[plan.selector_class] = plan.selector_class(self.scripts)
+        return selector
+
+    def documents(self, page, plan):
+        """Every JSON document embedded in the page's configured scripts; page is HTML or the plan's parsed tree"""
+        documents = []
+        for script in self._script_selector(plan).select(plan.document(page)):
+            text = ASSIGNMENT_PATTERN.sub('', script.text or '', count=1).strip().rstrip(';')
+            try:
+                documents.append(json.loads(text))
+            except ValueError:
+                continue
+        return documents
+
+    def extract(self, item):
+        """Normalized details/agent values for the fields present in one listing object"""
+        found = {'details': {}, 'agent': {}}
+        for key, path in self.fields.items():
+            spec = DETAIL_SPECS.get(key) or AGENT_SPECS.get(key)
+            values = [value for value in json_path(item, path) if isinstance(value, (str, int, float))]
+            if not spec or not values or values[0] == '':
+                continue
+            field, normalizer, attrs = spec
+            value = normalizer(str(values[0]))
+            if value is not None and value != "":
+                found['details' if key in DETAIL_SPECS else 'agent'][field] = value
+        return found
+
+    def search_page(self, page, plan):
+        """Structured values for each listing on a search page, keyed by URL path"""
+        by_url = {}
+        if not self.enabled or not self.listings_path:
+            return by_url
+        for document in self.documents(page, plan):
+            for item in json_path(document, self.listings_path):
+                urls = json_path(item, self.url_path)
+                if urls and isinstance(urls[0], str):
+                    by_url[url_key(urls[0])] = self.extract(item)
+        return by_url
+
+    def detail_page(self, page, plan):
+        """Structured values for the listing on a detail page"""
+        if not self.enabled:
+            return {'details': {}, 'agent': {}}
+        for document in self.documents(page, plan):
+            for item in json_path(document, self.listing_path):
+                # A JSON-LD script may hold a list of objects
+                for candidate in (item if isinstance(item, list) else [item]):
+                    found = self.extract(candidate)
+                    if found['details'] or found['agent']:
+                        return found
+        return {'details': {}, 'agent': {}}
+
+    def apply_to_cards(self, page, cards, plan):
+        """Attach the search page's structured values to matching cards"""
+        by_url = self.search_page(page, plan)
+        if not by_url:
+            return cards
+        for card in cards:
+            found = by_url.get(url_key(card.url))
+            if found:
+                card.structured = found
+        return cards
@@ -1,10 +1,18 @@
 import re
 import time
+import asyncio
 import random
 import logging
+import threading
 from functools import wraps
+from urllib.parse import urlparse
 from fake_useragent import UserAgent
 
+# Compiled once; these run for every field of every listing
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# A number with optional thousands separators, e.g. "1,200" or "2.5"
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
 def setup_logger(name, log_file, level=logging.INFO):
     """Set up a logger with file and console handlers"""
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -28,32 +36,24 @@ def clean_text(text):
     """Clean and normalize text"""
     if not text:
         return ""
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = WHITESPACE_PATTERN.sub(' ', text.strip())
     return text
 
-def format_price(price_text):
-    """Extract and format price from text"""
-    if not price_text:
-        return ""
-    
-    # Remove non-numeric characters except decimal point
-    price = re.sub(r'[^\d.]', '', price_text)
-    try:
-        return f"${float(price):,.0f}"
-    except ValueError:
-        return price_text
-
-def extract_number(text):
-    """Extract numbers from text"""
-    if not text:
-        return None
-    numbers = re.findall(r'\d+\.?\d*', text)
-    return float(numbers[0]) if numbers else None
-
 def random_delay(min_delay=1.0, max_delay=3.0):
     """Sleep for a random time between min and max seconds"""
     time.sleep(random.uniform(min_delay, max_delay))
 
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def host_slot(url, limit):
+    """Get the semaphore shared by all scrapers that bounds concurrent requests to a host"""
+    host = urlparse(url).netloc.lower()
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(max(1, limit))
+        return _host_slots[host]
+
 def retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,)):
     """Retry decorator with exponential backoff"""
     def decorator(func):
@@ -73,6 +73,25 @@ def retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,)):
         return wrapper
     return decorator
 
+def async_retry(max_attempts=3, delay=2.0, backoff=2.0, exceptions=(Exception,)):
+    """Retry decorator with exponential backoff for coroutines"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            attempts = 0
+            current_delay = delay
+            while attempts < max_attempts:
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as e:
+                    attempts += 1
+                    if attempts == max_attempts:
+                        raise e
+                    await asyncio.sleep(current_delay)
+                    current_delay *= backoff
+        return wrapper
+    return decorator
+
 def get_random_user_agent():
     """Get a random user agent"""
     ua = UserAgent()
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import http.server
+import socketserver
+import pytest
+from src.async_engine import AsyncCrawlEngine
+from src.change_tracker import ChangeTracker, DELISTED
+from src.config_loader import ConfigLoader
+from src.parse_pool import parse_search_html
+from src.response_cache import ResponseCache
+from benchmarks.bench_parser_backends import load_fixture
+
+SITE_NAME = 'staten_island'
+SEARCH_HTML = load_fixture(SITE_NAME, 'search').replace('https://www.example.com', '')
+DETAIL_HTML = load_fixture(SITE_NAME, 'detail')
+EMPTY_SEARCH_HTML = '<html><body><div id="property-list"></div></body></html>'
+CARDS_PER_PAGE = len(parse_search_html(SEARCH_HTML, ConfigLoader().get_config(SITE_NAME)))
+
+def search_page(page_num):
+    """A full page of listings whose URLs are distinct per page"""
+    return SEARCH_HTML.replace('/listing/', f'/listing/{page_num}-')
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """Search pages from search_pages (HTML, or a status code to fail with) and detail pages with an ETag"""
+    requests = []
+    # Search pages 1-2 with distinct listings and a failing page 3
+    search_pages = {'/search': search_page(1), '/search?page=2': search_page(2), '/search?page=3': 500}
+
+    def do_GET(self):
+        FixtureHandler.requests.append((self.path, self.headers.get('If-None-Match')))
+        body = FixtureHandler.search_pages.get(self.path, DETAIL_HTML)
+        if isinstance(body, int):
+            self.send_response(body)
+            self.end_headers()
+            return
+        if self.path.startswith('/listing/') and self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def base_url():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FixtureHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FixtureHandler.requests = []
+    search_pages = dict(FixtureHandler.search_pages)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    FixtureHandler.search_pages = search_pages
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, 'sleep', lambda delay, *args, **kwargs: real_sleep(0, *args, **kwargs))
+
+def site_config(base_url, max_pages=3):
+    return dict(
+        ConfigLoader().get_config(SITE_NAME),
+        base_url=base_url,
+        search_url='/search',
+        page_url_template='?page={page}',
+        max_pages=max_pages,
+        cache_ttl=0,
+        rate_limit={'requests_per_second': 1000, 'burst': 1000, 'min_rps': 100, 'max_rps': 1000}
+    )
+
+def crawl(base_url, response_cache=None, max_pages=3):
+    engine = AsyncCrawlEngine({SITE_NAME: site_config(base_url, max_pages)}, response_cache=response_cache)
+    return engine, engine.run()[SITE_NAME]
+
+def test_crawl_paginates_fetches_details_and_reports_failed_search_pages(base_url, tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    try:
+        engine, listings = crawl(base_url, cache)
+    finally:
+        cache.close()
+
+    assert len(listings) == 2 * CARDS_PER_PAGE
+    assert len({listing.url for listing in listings}) == 2 * CARDS_PER_PAGE
+    assert all(listing.details.property_type == 'Single Family' for listing in listings)
+    assert all(listing.agent.name == 'Jane Doe' for listing in listings)
+    # The failing page is reported, not silently crawled as a page without listings
+    assert engine.failed_pages[SITE_NAME] == 1
+    assert SITE_NAME not in engine.crawled_sites
+    assert engine.scraped_counts[SITE_NAME] == 2 * CARDS_PER_PAGE
+
+def test_stale_detail_pages_are_revalidated(base_url, tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    try:
+        crawl(base_url, cache)
+        FixtureHandler.requests = []
+        engine, listings = crawl(base_url, cache)
+        stats = dict(cache.stats[SITE_NAME])
+    finally:
+        cache.close()
+
+    detail_requests = [etag for path, etag in FixtureHandler.requests if path.startswith('/listing/')]
+    assert len(detail_requests) == 2 * CARDS_PER_PAGE
+    assert all(etag == '"v1"' for etag in detail_requests)
+    assert stats['revalidated'] == 2 * CARDS_PER_PAGE
+    # Revalidated pages are served from the cache body
+    assert all(listing.details.property_type == 'Single Family' for listing in listings)
+
+def track(tracker, engine, listings):
+    # The exporter stamps the site name before listings reach the tracker
+    for listing in listings:
+        listing.site = SITE_NAME
+    tracker.observe(listings)
+    tracker.finish_run(engine.crawled_sites)
+
+def delisted_urls(tracker):
+    return {change['url'] for change in tracker.changes() if change['change'] == DELISTED}
+
+def test_crawl_capped_before_the_last_page_does_not_delist(base_url, tmp_path):
+    FixtureHandler.search_pages = {
+        '/search': search_page(1), '/search?page=2': search_page(2), '/search?page=3': EMPTY_SEARCH_HTML
+    }
+    changes_path = str(tmp_path / 'changes.sqlite')
+
+    # Page 3 has no cards, so the first crawl saw the end of the results
+    tracker = ChangeTracker(changes_path)
+    engine, listings = crawl(base_url, max_pages=3)
+    assert engine.crawled_sites == {SITE_NAME}
+    track(tracker, engine, listings)
+    tracker.close()
+
+    # Stopping at page 1 leaves page 2's listings unseen, but they are not gone
+    tracker = ChangeTracker(changes_path)
+    engine, listings = crawl(base_url, max_pages=1)
+    assert engine.crawled_sites == set()
+    track(tracker, engine, listings)
+    assert delisted_urls(tracker) == set()
+    tracker.close()
+
+    # A crawl that reaches the end again does delist what it no longer finds
+    FixtureHandler.search_pages['/search?page=2'] = EMPTY_SEARCH_HTML
+    tracker = ChangeTracker(changes_path)
+    engine, listings = crawl(base_url, max_pages=3)
+    assert engine.crawled_sites == {SITE_NAME}
+    track(tracker, engine, listings)
+    assert len(delisted_urls(tracker)) == CARDS_PER_PAGE
+    assert all('/listing/2-' in url for url in delisted_urls(tracker))
+    tracker.close()
@@ -0,0 +1,50 @@
+from src.change_tracker import ChangeTracker, NEW, PRICE_CHANGE, UPDATED, DELISTED, RELISTED
+from src.listing import Listing
+
+SITE_NAME = 'staten_island'
+
+def listing(url, price, title='Home'):
+    return Listing(site=SITE_NAME, url=url, title=title, price_value=price)
+
+def run(path, listings, completed_sites=(SITE_NAME,)):
+    """One tracked run; returns {url: change} for what it recorded"""
+    tracker = ChangeTracker(path)
+    try:
+        tracker.observe(listings)
+        tracker.finish_run(completed_sites)
+        return {change['url']: change for change in tracker.changes()}
+    finally:
+        tracker.close()
+
+def test_changes_are_classified_run_over_run(tmp_path):
+    path = str(tmp_path / 'changes.sqlite')
+    first = run(path, [listing('/a', 500000), listing('/b', 600000), listing('/c', 700000)])
+    assert {url: change['change'] for url, change in first.items()} == {'/a': NEW, '/b': NEW, '/c': NEW}
+
+    second = run(path, [listing('/a', 450000), listing('/b', 600000, title='Renovated home')])
+    assert {url: change['change'] for url, change in second.items()} == {
+        '/a': PRICE_CHANGE, '/b': UPDATED, '/c': DELISTED
+    }
+    assert (second['/a']['old_price'], second['/a']['new_price']) == (500000, 450000)
+    assert second['/c']['old_price'] == 700000
+
+    third = run(path, [listing('/a', 450000), listing('/b', 600000, title='Renovated home'), listing('/c', 650000)])
+    # Unchanged listings record nothing; the delisted one comes back with its last known price
+    assert {url: change['change'] for url, change in third.items()} == {'/c': RELISTED}
+    assert (third['/c']['old_price'], third['/c']['new_price']) == (700000, 650000)
+
+def test_listings_of_an_incomplete_site_are_not_delisted(tmp_path):
+    path = str(tmp_path / 'changes.sqlite')
+    run(path, [listing('/a', 500000), listing('/b', 600000)])
+    assert run(path, [listing('/a', 500000)], completed_sites=()) == {}
+    assert run(path, [listing('/a', 500000)])['/b']['change'] == DELISTED
+
+def test_property_ids_reach_the_changes_of_the_run(tmp_path):
+    tracker = ChangeTracker(str(tmp_path / 'changes.sqlite'))
+    try:
+        tracker.observe([listing('/a', 500000)])
+        tracker.set_property_ids([('p1', SITE_NAME, '/a')])
+        [change] = tracker.changes()
+    finally:
+        tracker.close()
+    assert change['property_id'] == 'p1'
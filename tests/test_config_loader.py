@@ -0,0 +1,16 @@
+import json
+import pytest
+from src.config_loader import ConfigLoader
+
+@pytest.mark.parametrize('parser', ['bs4', 'lxml'])
+@pytest.mark.parametrize('selector', ['img.photo::attr(', 'div[', 'a::before'])
+def test_invalid_selector_names_site_and_field(parser, selector, tmp_path):
+    with open('config/sites.json') as f:
+        configs = json.load(f)
+    configs['staten_island']['parser'] = parser
+    configs['staten_island']['selectors']['image_url'] = selector
+    config_file = tmp_path / 'sites.json'
+    config_file.write_text(json.dumps(configs))
+
+    with pytest.raises(Exception, match='Invalid selector for site staten_island field image_url'):
+        ConfigLoader(str(config_file))
@@ -0,0 +1,83 @@
+import pytest
+from src.dedupe import address_key, property_ids, dedupe_store
+from src.listing import Listing, Details
+from src.listing_store import ListingStore
+
+@pytest.mark.parametrize('text, key', [
+    ('12 W. 5th Street, Apt 4B, Brooklyn, NY 11201', ('12 w 5 st', '4b', '11201')),
+    ('12 West 5th St #4B, Brooklyn, NY 11201', ('12 w 5 st', '4b', '11201')),
+    ('12 W 5th St, Unit 4B, Brooklyn, NY 11201-1234', ('12 w 5 st', '4b', '11201')),
+    ('45-12 Queens Blvd, Sunnyside, NY 11104', ('45-12 queens blvd', '', '11104')),
+    # A five digit house number is not taken for the ZIP
+    ('10301 Amboy Road, Staten Island, NY 10312', ('10301 amboy rd', '', '10312')),
+    ('Main Street, Brooklyn', None),
+    ('', None),
+    (None, None),
+])
+def test_address_key(text, key):
+    assert address_key(text) == key
+
+def test_unit_glued_to_the_next_word_stops_at_the_capital():
+    assert address_key('12 W 5th St #4Brooklyn')[1] == '4'
+
+def listing(location, price, beds=None, site='site_a', url=None):
+    return Listing(site=site, url=url or f'/{site}/{location}/{price}/{beds}', location=location,
+                   price_value=price, details=Details(beds=beds))
+
+def test_copies_across_sites_share_an_id():
+    ids = property_ids([
+        listing('12 W. 5th Street, Apt 4B, Brooklyn, NY 11201', 900000, 2, site='site_a'),
+        listing('12 West 5th St #4B, Brooklyn, NY 11201', 925000, 2, site='site_b'),
+        listing('12 W 5th St, Apt 4C, Brooklyn, NY 11201', 900000, 2, site='site_b'),
+    ])
+    assert ids[0] == ids[1]
+    assert ids[2] != ids[0]
+
+def test_price_or_beds_tell_listings_at_one_address_apart():
+    ids = property_ids([
+        listing('7 Elm Pl, Brooklyn, NY 11201', 500000, 2),
+        listing('7 Elm Place, Brooklyn, NY 11201', 510000, 3, site='site_b'),
+    ])
+    assert ids[0] != ids[1]
+
+def test_ids_follow_the_zip_not_the_cluster_size():
+    staten_island = listing('123 Main St, Staten Island, NY 10301', 500000, 3)
+    flushing = [listing('123 Main Street, Flushing, NY 11354', 700000, 2, site=site) for site in ('b', 'c', 'd')]
+
+    before = property_ids([staten_island, flushing[0]])
+    # The Flushing cluster outgrows the Staten Island one
+    after = property_ids([staten_island] + flushing)
+    assert before[0] != before[1]
+    assert after[0] == before[0]
+    assert set(after[1:]) == {before[1]}
+
+def test_a_listing_without_zip_does_not_chain_two_zips():
+    ids = property_ids([
+        listing('123 Main St, Staten Island, NY 10301', 500000),
+        listing('123 Main St', 500000, site='site_b'),
+        listing('123 Main St, Flushing, NY 11354', 500000, site='site_c'),
+    ])
+    assert ids[0] != ids[2]
+    assert ids[1] in (ids[0], ids[2])
+
+def test_listings_without_an_address_get_their_own_id():
+    ids = property_ids([listing('Brooklyn', 500000, url='/a'), listing('Brooklyn', 500000, url='/b')])
+    assert ids[0] != ids[1]
+
+def test_dedupe_store_writes_only_changed_ids(tmp_path):
+    store = ListingStore(str(tmp_path / 'listings.sqlite'))
+    try:
+        store.save([
+            listing('12 W 5th St, Apt 4B, Brooklyn, NY 11201', 900000, 2, site='site_a'),
+            listing('12 West 5th St #4B, Brooklyn, NY 11201', 925000, 2, site='site_b'),
+        ])
+        first = dedupe_store(store)
+        assert len(first) == 2
+        assert first[0][0] == first[1][0]
+        assert dedupe_store(store) == []
+
+        copy = listing('12 W 5th St, Apt 4B, Brooklyn, NY 11201', 910000, 2, site='site_c')
+        store.save([copy])
+        assert dedupe_store(store) == [(first[0][0], 'site_c', copy.url)]
+    finally:
+        store.close()
@@ -0,0 +1,15 @@
+import json
+from src.exporter import Exporter
+from src.listing import Listing
+
+def test_json_export_starts_from_an_empty_listings_json(tmp_path):
+    (tmp_path / 'listings.json').write_text('')
+    exporter = Exporter(str(tmp_path), json_format='json')
+    try:
+        assert exporter.export_listings([Listing(url='/listing/1', title='Home')], 'staten_island') == 1
+        assert exporter.export_listings([Listing(url='/listing/2', title='Home')], 'staten_island') == 1
+    finally:
+        exporter.close()
+
+    rows = json.loads((tmp_path / 'listings.json').read_text())
+    assert [row['url'] for row in rows] == ['/listing/1', '/listing/2']
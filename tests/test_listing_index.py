@@ -0,0 +1,44 @@
+from src.listing import Listing, Details
+from src.listing_index import ListingIndex
+
+SITE_NAME = 'staten_island'
+DETAIL = {'details': {'beds': 3.0, 'property_type': 'Single Family'}, 'agent': {'name': 'Jane Doe'}}
+
+def card(price='$500,000'):
+    return Listing(url='/listing/1', title='Home', price=price, location='10 Elm St')
+
+def test_unchanged_cards_reuse_the_stored_detail(tmp_path):
+    index = ListingIndex(str(tmp_path / 'index.sqlite'))
+    try:
+        assert not index.reuse_detail(card(), SITE_NAME, max_age=3600)
+        index.record(card(), SITE_NAME, DETAIL)
+
+        listing = card()
+        assert index.reuse_detail(listing, SITE_NAME, max_age=3600)
+        assert index.stats[SITE_NAME] == {'reused': 1, 'fetched': 1}
+    finally:
+        index.close()
+    assert listing.details == Details(beds=3.0, property_type='Single Family')
+    assert listing.agent.name == 'Jane Doe'
+
+def test_changed_or_old_details_are_fetched_again(tmp_path):
+    index = ListingIndex(str(tmp_path / 'index.sqlite'))
+    try:
+        index.record(card(), SITE_NAME, DETAIL)
+        assert not index.reuse_detail(card(price='$480,000'), SITE_NAME, max_age=3600)
+        assert not index.reuse_detail(card(), SITE_NAME, max_age=-1)
+    finally:
+        index.close()
+
+def test_seen_without_detail_keeps_the_old_fingerprint(tmp_path):
+    index = ListingIndex(str(tmp_path / 'index.sqlite'))
+    try:
+        index.record(card(), SITE_NAME, DETAIL)
+        # The changed card's detail fetch failed, so the next run must still refetch it
+        index.record(card(price='$480,000'), SITE_NAME)
+        assert not index.reuse_detail(card(price='$480,000'), SITE_NAME, max_age=3600)
+        # A card never fetched has nothing to reuse
+        index.record(Listing(url='/listing/2', title='Other'), SITE_NAME)
+        assert not index.reuse_detail(Listing(url='/listing/2', title='Other'), SITE_NAME, max_age=3600)
+    finally:
+        index.close()
@@ -0,0 +1,53 @@
+from src.listing import Listing, Details, Agent
+from src.listing_store import ListingStore
+
+def listing(price, details=None, agent=None, url='/listing/1'):
+    return Listing(site='staten_island', url=url, title='Home', price=f'${price:,}', price_value=price,
+                   location='10 Elm St, Staten Island, NY 10301', details=details, agent=agent)
+
+def test_upsert_without_details_keeps_the_stored_details(tmp_path):
+    store = ListingStore(str(tmp_path / 'listings.sqlite'))
+    try:
+        store.save([listing(500000, Details(beds=3.0, property_type='Single Family'), Agent(name='Jane Doe'))])
+        # A later run only saw the search card
+        assert store.save([listing(480000)]) == 1
+        [stored] = store.query()
+    finally:
+        store.close()
+
+    assert stored.price_value == 480000
+    assert stored.details == Details(beds=3.0, property_type='Single Family')
+    assert stored.agent == Agent(name='Jane Doe')
+
+def test_upsert_with_details_replaces_them(tmp_path):
+    store = ListingStore(str(tmp_path / 'listings.sqlite'))
+    try:
+        store.save([listing(500000, Details(beds=3.0))])
+        store.save([listing(500000, Details(beds=4.0))])
+        assert store.count() == 1
+        [stored] = store.query()
+    finally:
+        store.close()
+
+    assert stored.details.beds == 4.0
+
+def test_listings_without_site_or_url_are_not_stored(tmp_path):
+    store = ListingStore(str(tmp_path / 'listings.sqlite'))
+    try:
+        assert store.save([Listing(site='staten_island'), Listing(url='/listing/1')]) == 0
+        assert store.count() == 0
+    finally:
+        store.close()
+
+def test_query_filters(tmp_path):
+    store = ListingStore(str(tmp_path / 'listings.sqlite'))
+    try:
+        store.save([
+            listing(300000, Details(property_type='Condo'), url='/listing/1'),
+            listing(700000, Details(property_type='Single Family'), url='/listing/2'),
+        ])
+        assert [row.url for row in store.query(min_price=400000)] == ['/listing/2']
+        assert [row.url for row in store.query(property_type='Condo')] == ['/listing/1']
+        assert store.query(site='onekey_sales') == []
+    finally:
+        store.close()
@@ -0,0 +1,22 @@
+from src.listing import Listing, Details
+from src.normalizer import normalize_listings
+
+def listings():
+    return [
+        Listing(price='$1,250,000', details=Details(beds='3 beds', baths='2.5 baths', sqft='1,800 sq ft')),
+        Listing(price='Price on request', details=Details(beds='Studio')),
+        Listing(price='$2,400/mo'),
+    ]
+
+def test_normalize_listings():
+    normalized = normalize_listings(listings())
+    assert [(listing.price, listing.price_value) for listing in normalized] == [
+        ('$1,250,000', 1250000.0), ('Price on request', None), ('$2,400', 2400.0)
+    ]
+    assert (normalized[0].details.beds, normalized[0].details.baths, normalized[0].details.sqft) == (3.0, 2.5, 1800.0)
+    assert normalized[1].details.beds is None
+
+def test_normalizing_twice_changes_nothing():
+    once = normalize_listings(listings())
+    twice = normalize_listings([listing.copy() for listing in normalize_listings(listings())])
+    assert [listing.to_dict() for listing in twice] == [listing.to_dict() for listing in once]
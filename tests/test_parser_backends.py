@@ -0,0 +1,9 @@
+import os
+import pytest
+from src.config_loader import ConfigLoader
+from benchmarks.bench_parser_backends import FIXTURE_DIR, check_site
+
+@pytest.mark.parametrize('site_name', sorted(os.listdir(FIXTURE_DIR)))
+def test_lxml_backend_matches_bs4_on_fixtures(site_name):
+    selectors = ConfigLoader().get_config(site_name)['selectors']
+    assert check_site(site_name, selectors) == []
@@ -0,0 +1,59 @@
+import pytest
+from src.rate_limiter import TokenBucket, RateLimiter, parse_retry_after
+
+def bucket(**settings):
+    return TokenBucket(**dict(dict(requests_per_second=1.0, burst=2, min_rps=0.1, max_rps=2.0), **settings))
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_throttling_responses_halve_the_rate(status):
+    limiter = bucket()
+    limiter.record(0.2, status)
+    assert limiter.rate == 0.5
+
+def test_errors_within_the_cooldown_back_off_once():
+    limiter = bucket(cooldown=60)
+    for status in (429, 503, 503):
+        limiter.record(0.2, status)
+    assert limiter.rate == 0.5
+
+def test_rate_never_drops_below_min_rps():
+    limiter = bucket(cooldown=0)
+    for _ in range(10):
+        limiter.record(0.2, 503)
+    assert limiter.rate == 0.1
+
+def test_healthy_responses_speed_up_to_max_rps():
+    limiter = bucket(increase=0.5)
+    for _ in range(5):
+        limiter.record(0.2, 200)
+    assert limiter.rate == 2.0
+
+def test_slow_responses_back_off():
+    limiter = bucket()
+    limiter.record(0.2, 200)
+    limiter.record(1.0, 200)
+    assert limiter.rate == pytest.approx(0.525)
+
+def test_retry_after_pauses_the_bucket():
+    limiter = bucket()
+    assert limiter.reserve() == 0
+    limiter.record(0.2, 429, retry_after=30)
+    # A token is still there, but the pause holds every request back
+    assert 29 < limiter.reserve() <= 30
+
+def test_requests_past_the_burst_queue_behind_each_other():
+    limiter = bucket(requests_per_second=2.0, burst=1)
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == pytest.approx(0.5, abs=0.01)
+    assert limiter.reserve() == pytest.approx(1.0, abs=0.01)
+
+@pytest.mark.parametrize('value, seconds', [('30', 30.0), ('Wed, 21 Oct 2026 07:28:00 GMT', None), (None, None)])
+def test_parse_retry_after(value, seconds):
+    assert parse_retry_after(value) == seconds
+
+def test_buckets_are_shared_per_domain():
+    limiter = RateLimiter()
+    first = limiter.bucket('https://www.example.com/search', {'delay': 4.0})
+    assert limiter.bucket('https://WWW.example.com/listing/1', {}) is first
+    assert first.rate == 0.25
+    assert limiter.bucket('https://other.example.com/', {'rate_limit': {'requests_per_second': 1.5}}).rate == 1.5
@@ -0,0 +1,86 @@
+import os
+import itertools
+import pytest
+from src.config_loader import ConfigLoader
+from src.response_cache import ResponseCache, normalize_url
+from src.scraper import BaseScraper
+
+SITE_NAME = 'staten_island'
+URL = 'https://www.example.com/listing/1'
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A time.time that moves one second per call, so access order never ties"""
+    ticks = itertools.count(1000000)
+    monkeypatch.setattr('src.response_cache.time.time', lambda: float(next(ticks)))
+
+def body():
+    # Random text does not compress, so each entry takes about 1KB of the limit
+    return os.urandom(1024).hex()
+
+def test_urls_are_normalized_into_one_key():
+    assert normalize_url('HTTPS://Example.com:443/a?b=2&a=1&utm_source=x') == 'https://example.com/a?a=1&b=2'
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), max_bytes=3000)
+    try:
+        cache.put('https://example.com/a', body())
+        cache.put('https://example.com/b', body())
+        # Reading a makes b the least recently used
+        assert cache.get('https://example.com/a') is not None
+        cache.put('https://example.com/c', body())
+
+        assert cache.get('https://example.com/b') is None
+        assert cache.get('https://example.com/a') is not None
+        assert cache.get('https://example.com/c') is not None
+    finally:
+        cache.close()
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+class FakeFetcher:
+    """Answers 304 to a matching If-None-Match, otherwise a page with an ETag"""
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, bucket=None):
+        self.requests.append(headers)
+        if headers and headers.get('If-None-Match') == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, '<html>fresh</html>', {'ETag': '"v1"'})
+
+    def close(self):
+        pass
+
+class FixtureScraper(BaseScraper):
+    def scrape(self):
+        return []
+
+def test_http_tier_revalidates_stale_detail_pages(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    fetcher = FakeFetcher()
+    config = dict(ConfigLoader().get_config(SITE_NAME), fetch_mode={'detail': 'http'},
+                  rate_limit={'requests_per_second': 1000, 'burst': 1000})
+    scraper = FixtureScraper(SITE_NAME, config, http_fetcher=fetcher, response_cache=cache)
+    try:
+        assert scraper.fetch_page(URL, 'detail', scraper.selenium_scraper) == '<html>fresh</html>'
+        stored = cache.get(URL)
+        assert stored.etag == '"v1"'
+        assert not stored.is_fresh(0)
+
+        assert scraper.fetch_page(URL, 'detail', scraper.selenium_scraper, cached=stored) == '<html>fresh</html>'
+        revalidated = cache.get(URL)
+        stats = dict(cache.stats[SITE_NAME])
+    finally:
+        scraper.close()
+        cache.close()
+
+    assert fetcher.requests == [None, {'If-None-Match': '"v1"'}]
+    # The 304 keeps the cached body and restarts its freshness
+    assert revalidated.body == stored.body
+    assert revalidated.fetched_at > stored.fetched_at
+    assert stats == {'hit': 0, 'revalidated': 1, 'miss': 1}
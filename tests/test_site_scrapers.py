@@ -0,0 +1,90 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from src.config_loader import ConfigLoader
+from src.driver_pool import DriverPool, PooledDriver
+from src.selenium_scraper import SeleniumScraper
+from src.sites.onekey_sales import OneKeySalesScraper
+from benchmarks.bench_parser_backends import load_fixture
+
+SITE_NAME = 'onekey_sales'
+
+class FakeButton:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+    def is_enabled(self):
+        return self.enabled
+
+    def click(self):
+        pass
+
+class FakeDriver:
+    """A browser whose results end after last_page; pagination links past it are missing or disabled"""
+    window_handles = ['main']
+    current_url = 'https://www.example.com/search'
+
+    def __init__(self, last_page, disabled):
+        self.last_page = last_page
+        self.disabled = disabled
+        self.page_source = load_fixture(SITE_NAME, 'search')
+
+    def find_element(self, by, selector):
+        if 'data-page' not in selector:
+            return FakeButton()
+        page_num = int(selector.split("data-page='")[1].split("'")[0])
+        if page_num <= self.last_page:
+            return FakeButton()
+        if self.disabled:
+            return FakeButton(enabled=False)
+        raise NoSuchElementException(selector)
+
+    def execute_script(self, script, *args):
+        return 0
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        pass
+
+def scrape(monkeypatch, last_page, max_pages, disabled=False, fetch_mode='browser'):
+    monkeypatch.setattr(DriverPool, '_create_driver', lambda pool: PooledDriver(FakeDriver(last_page, disabled)))
+
+    def fetch_page(browser, url, wait_for_element=None, **kwargs):
+        if not browser.driver:
+            browser.setup_driver()
+        return browser.driver.page_source
+    monkeypatch.setattr(SeleniumScraper, 'fetch_page', fetch_page)
+
+    config = dict(ConfigLoader().get_config(SITE_NAME), max_pages=max_pages, fetch_mode=fetch_mode,
+                  rate_limit={'requests_per_second': 1000, 'burst': 1000})
+    scraper = OneKeySalesScraper(SITE_NAME, config)
+    scraper.fetch_listing_detail = lambda url: None
+    try:
+        listings = scraper.scrape()
+    finally:
+        scraper.close()
+    return scraper, listings
+
+@pytest.mark.parametrize('disabled', [False, True])
+def test_running_out_of_next_page_links_completes_the_crawl(monkeypatch, disabled):
+    scraper, listings = scrape(monkeypatch, last_page=3, max_pages=5, disabled=disabled)
+    assert listings
+    assert scraper.crawled_every_page()
+
+def test_stopping_at_the_page_limit_is_not_a_complete_crawl(monkeypatch):
+    scraper, listings = scrape(monkeypatch, last_page=10, max_pages=5)
+    assert listings
+    assert not scraper.reached_last_page
+    assert not scraper.crawled_every_page()
+
+@pytest.mark.parametrize('fetch_mode', ['http', 'auto', {'search': 'http', 'detail': 'http'}])
+def test_search_pages_load_in_the_browser_when_pagination_clicks(monkeypatch, fetch_mode):
+    def no_http(fetcher, *args, **kwargs):
+        raise AssertionError('search page fetched over HTTP')
+    monkeypatch.setattr('src.http_fetcher.HttpFetcher.get', no_http)
+
+    scraper, listings = scrape(monkeypatch, last_page=3, max_pages=5, fetch_mode=fetch_mode)
+    assert listings
+    assert scraper.failed_pages == 0
+    assert scraper.crawled_every_page()
@@ -0,0 +1,72 @@
+import pytest
+from src.config_loader import ConfigLoader
+from src.parse_pool import parse_search_html, parse_detail_html
+from src.scraper import BaseScraper
+from src.selector_plan import BACKENDS
+from benchmarks.bench_parser_backends import load_fixture
+
+CONFIG_LOADER = ConfigLoader()
+STRUCTURED_SITES = [site for site, config in CONFIG_LOADER.configs.items() if config.get('structured_data')]
+
+class FixtureScraper(BaseScraper):
+    def scrape(self):
+        return []
+
+@pytest.mark.parametrize('site_name', STRUCTURED_SITES)
+def test_fixture_cards_with_structured_data_skip_detail_fetch(site_name, monkeypatch):
+    scraper = FixtureScraper(site_name, CONFIG_LOADER.get_config(site_name))
+    fetched = []
+    monkeypatch.setattr(scraper, 'fetch_listing_detail', lambda url: fetched.append(url))
+    try:
+        cards = scraper.parse_search_page(load_fixture(site_name, 'search'))
+        listings = [scraper.process_listing_card(card) for card in cards]
+    finally:
+        scraper.close()
+
+    assert scraper.structured_skips > 0
+    # Cards without structured data, or missing a required field, still load their detail page
+    assert 0 < len(fetched) == len(cards) - scraper.structured_skips
+    skipped = [listing for listing in listings if listing.url not in fetched]
+    assert all(listing.details.property_type == 'Single Family' for listing in skipped)
+    assert all(listing.agent.name == 'Jane Doe' for listing in skipped)
+
+class ParseCounter:
+    """Counts documents parsed by either parser backend"""
+    def __init__(self, monkeypatch):
+        self.count = 0
+        for selector_class in BACKENDS.values():
+            monkeypatch.setattr(selector_class, 'document', self.wrap(selector_class.document))
+
+    def wrap(self, document):
+        def counted(html):
+            self.count += 1
+            return document(html)
+        return staticmethod(counted)
+
+@pytest.mark.parametrize('parser', sorted(BACKENDS))
+@pytest.mark.parametrize('site_name', STRUCTURED_SITES)
+def test_pages_with_structured_data_are_parsed_once(site_name, parser, monkeypatch):
+    config = dict(CONFIG_LOADER.get_config(site_name), parser=parser)
+    parses = ParseCounter(monkeypatch)
+
+    cards = parse_search_html(load_fixture(site_name, 'search'), config)
+    assert parses.count == 1
+    assert any(card.structured for card in cards)
+
+    parses.count = 0
+    parse_detail_html(load_fixture(site_name, 'detail'), config)
+    assert parses.count == 1
+
+@pytest.mark.parametrize('site_name', STRUCTURED_SITES)
+def test_auto_mode_checks_an_http_page_with_one_parse(site_name, monkeypatch):
+    config = dict(CONFIG_LOADER.get_config(site_name), fetch_mode='auto',
+                  rate_limit={'requests_per_second': 1000, 'burst': 1000})
+    scraper = FixtureScraper(site_name, config)
+    response = type('Response', (), {'status_code': 200, 'text': load_fixture(site_name, 'detail'), 'headers': {}})
+    monkeypatch.setattr(scraper.http_fetcher, 'get', lambda url, headers=None, bucket=None: response)
+    parses = ParseCounter(monkeypatch)
+    try:
+        assert scraper.fetch_page('https://www.example.com/listing/1', 'detail', None) == response.text
+    finally:
+        scraper.close()
+    assert parses.count == 1